@@ -1,12 +1,17 @@
+import os
 from datetime import datetime, timedelta
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from cache import TTLCache
 from database import get_db
 from models.user import User
+from password_pool import PasswordWorkerPool
 
 # Separate secret key for transfer-system (not shared with other systems)
 SECRET_KEY = "transfer-system-secret-key-change-in-production-2024"
@@ -16,6 +21,19 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 480  # 8 hours
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# bcrypt runs here rather than in the shared threadpool, so login storms
+# cannot starve the rest of the API
+password_pool = PasswordWorkerPool(
+    max_workers=int(os.getenv("PASSWORD_POOL_WORKERS", str(os.cpu_count() or 1))),
+    max_queue=int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "64")),
+)
+
+# Resolved principals keyed by token subject, so hot reads skip the users lookup
+user_cache = TTLCache(
+    maxsize=int(os.getenv("USER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+)
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -36,10 +54,15 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def get_current_user(
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
+    return await user_from_token(token, db)
+
+
+async def user_from_token(token: str, db: AsyncSession) -> User:
+    """Resolve a bearer token to its user, raising 401 when it is not valid"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -53,16 +76,58 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.username == username).first()
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+
+    user = await get_user_by_username(db, username)
     if user is None:
         raise credentials_exception
+    # Detach so the cached instance is not expired by this session's commits
+    db.expunge(user)
+    user_cache.set(username, user)
     return user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    user = db.query(User).filter(User.username == username).first()
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    user = await get_user_by_username(db, username)
+    # Hand the connection back before bcrypt: a login burst waiting on the
+    # password pool must not hold the DB pool the other routes need.
+    # Detach first so ending the transaction does not expire the user.
+    if user is not None:
+        db.expunge(user)
+    await db.rollback()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await password_pool.run(verify_password, password, user.hashed_password):
         return None
     return user
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = session.info.setdefault("changed_usernames", set())
+    for obj in list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            history = inspect(obj).attrs.username.history
+            changed.update(history.deleted or ())
+            changed.add(obj.username)
+    for username in changed:
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    # Evict again once committed, in case a concurrent request re-cached the old row
+    for username in session.info.pop("changed_usernames", ()):
+        user_cache.invalidate(username)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_users(session):
+    session.info.pop("changed_usernames", None)
@@ -0,0 +1,280 @@
+"""Measure latency and throughput of the API routes at several dataset sizes.
+
+For each scale a SQLite database is filled by generate_data.py (and kept
+in --data-dir for later runs). The app then runs in-process against a
+copy of it, driven through httpx's ASGI transport by --concurrency
+clients, so timings cover routing, auth, queries and serialization but
+not the network. Each route gets
+p50/p95/p99 latency and requests/s. The results are written as JSON, and
+--compare checks them against an earlier baseline, exiting non-zero when
+any route's p95 got slower by more than --tolerance.
+
+Run from backend/:
+    python -m benchmarks.api --scales 1000,10000,100000
+    python -m benchmarks.api --scales 10000 --compare benchmarks/baselines/sqlite.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+LOGIN = {"username": "admin", "password": "admin123"}
+
+
+def routes(sample):
+    """(name, method, path, body) factories; each takes the request index"""
+    transfer_ids = sample["transfer_ids"]
+    references = sample["references"]
+    form_ids = sample["form_ids"]
+    ticket_ids = sample["ticket_ids"]
+    jira_ids = sample["jira_ids"]
+
+    def pick(values, i):
+        return values[i % len(values)]
+
+    return {
+        "atlas.list_transfers": lambda i: ("GET", "/atlas/transfers?limit=50", None),
+        "atlas.list_transfers_by_status": lambda i: ("GET", "/atlas/transfers?status=pending&limit=50", None),
+        "atlas.get_transfer": lambda i: ("GET", f"/atlas/transfers/{pick(transfer_ids, i)}", None),
+        "atlas.get_transfer_by_reference": lambda i: ("GET", f"/atlas/transfers/reference/{pick(references, i)}", None),
+        "atlas.get_transfer_comparison": lambda i: ("GET", f"/atlas/transfers/{pick(transfer_ids, i)}/comparison", None),
+        "atlas.get_transfer_case": lambda i: ("GET", f"/atlas/transfers/{pick(transfer_ids, i)}/case", None),
+        "atlas.get_transfer_comparisons": lambda i: ("GET", "/atlas/comparisons?limit=50", None),
+        "atlas.list_mismatches": lambda i: ("GET", "/atlas/mismatches?limit=50", None),
+        "atlas.update_transfer": lambda i: ("PUT", f"/atlas/transfers/{pick(transfer_ids, i)}", {"notes": f"benchmark {i}"}),
+        "atlas.bulk_update_transfers": lambda i: ("POST", "/atlas/transfers/bulk-update", {
+            "ids": transfer_ids[:50], "notes": f"benchmark batch {i}",
+        }),
+        "t2220.list_forms": lambda i: ("GET", "/t2220/forms?limit=50", None),
+        "t2220.get_form": lambda i: ("GET", f"/t2220/forms/{pick(form_ids, i)}", None),
+        "t2220.verify_form": lambda i: ("POST", f"/t2220/forms/{pick(form_ids, i)}/verify", {"verified": True}),
+        "dashboard.stats": lambda i: ("GET", "/dashboard/stats", None),
+        "zendesk.list_tickets": lambda i: ("GET", "/zendesk/tickets?limit=50", None),
+        "zendesk.list_tickets_by_status": lambda i: ("GET", "/zendesk/tickets?status=open&limit=50", None),
+        "zendesk.search_tickets": lambda i: ("GET", "/zendesk/tickets/search?q=rrsp+transfer+pending", None),
+        "zendesk.get_ticket": lambda i: ("GET", f"/zendesk/tickets/{pick(ticket_ids, i)}", None),
+        "zendesk.create_ticket": lambda i: ("POST", "/zendesk/tickets", {
+            "customer_name": "Benchmark Customer",
+            "customer_email": "benchmark@email.com",
+            "subject": f"Benchmark ticket {i}",
+            "description": "Where is my transfer?",
+            "transfer_reference": pick(references, i),
+        }),
+        "zendesk.update_ticket": lambda i: ("PUT", f"/zendesk/tickets/{pick(ticket_ids, i)}", {"status": "in_progress"}),
+        "zendesk.bulk_update_tickets": lambda i: ("POST", "/zendesk/tickets/bulk-update", {
+            "ids": ticket_ids[:50], "resolution_notes": f"benchmark batch {i}",
+        }),
+        "jira.list_tickets": lambda i: ("GET", "/jira/tickets?limit=50", None),
+        "jira.get_ticket": lambda i: ("GET", f"/jira/tickets/{pick(jira_ids, i)}", None),
+        "jira.create_ticket": lambda i: ("POST", "/jira/tickets", {
+            "zendesk_ticket_id": pick(ticket_ids, i),
+            "transfer_id": pick(transfer_ids, i),
+            "summary": f"Benchmark escalation {i}",
+            "description": "Transfer delayed",
+        }),
+        "jira.update_ticket": lambda i: ("PUT", f"/jira/tickets/{pick(jira_ids, i)}", {"status": "In Progress"}),
+        "jira.bulk_update_tickets": lambda i: ("POST", "/jira/tickets/bulk-update", {
+            "ids": jira_ids[:50], "resolution": f"benchmark batch {i}",
+        }),
+        "users.list_users": lambda i: ("GET", "/users/", None),
+        "auth.me": lambda i: ("GET", "/auth/me", None),
+    }
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+async def _measure(client, factory, requests, concurrency):
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, path, body = factory(i)
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+async def load_sample(db):
+    """Ids the detail routes cycle through: the newest rows of each table"""
+    from sqlalchemy import select
+
+    from models.transfer import Transfer
+    from models.t2220_form import T2220Form
+    from models.zendesk_ticket import ZendeskTicket
+    from models.jira_ticket import JiraTicket
+
+    async def newest(column, model):
+        result = await db.execute(select(column).order_by(model.id.desc()).limit(500))
+        return result.scalars().all()
+
+    return {
+        "transfer_ids": await newest(Transfer.id, Transfer),
+        "references": await newest(Transfer.reference_number, Transfer),
+        "form_ids": await newest(T2220Form.id, T2220Form),
+        "ticket_ids": await newest(ZendeskTicket.id, ZendeskTicket),
+        "jira_ids": await newest(JiraTicket.id, JiraTicket),
+    }
+
+
+async def login(client):
+    response = await client.post("/auth/login", json=LOGIN)
+    response.raise_for_status()
+    client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+
+async def _run_scale(requests, concurrency, routes_filter):
+    import httpx
+
+    from database import AsyncSessionLocal
+    from main import app
+    from startup import init_schema
+
+    # ASGITransport sends no lifespan events, so bring a cached database's schema up to date here
+    init_schema()
+    async with AsyncSessionLocal() as db:
+        sample = await load_sample(db)
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await login(client)
+
+        for name, factory in routes(sample).items():
+            if routes_filter and not any(part in name for part in routes_filter):
+                continue
+            # One untimed pass warms caches and connections
+            await _measure(client, factory, min(concurrency, requests), concurrency)
+            results[name] = await _measure(client, factory, requests, concurrency)
+            print(f"  {name:34} p50 {results[name]['p50_ms']:8.2f}ms  p95 {results[name]['p95_ms']:8.2f}ms  "
+                  f"p99 {results[name]['p99_ms']:8.2f}ms  {results[name]['throughput_rps']:8.1f} req/s", file=sys.stderr)
+    return results
+
+
+def prepare(scale, data_dir, seed):
+    """Return the path of a database holding ``scale`` transfers, generating it on first use"""
+    path = Path(data_dir) / f"benchmark-{scale}-seed{seed}.db"
+    if not path.exists():
+        print(f"Generating {scale} transfers into {path}", file=sys.stderr)
+        env = {**os.environ, "DATABASE_URL": f"sqlite:///{path}"}
+        subprocess.run(
+            [sys.executable, "generate_data.py", "--transfers", str(scale), "--seed", str(seed)],
+            env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+    return path
+
+
+def working_copy(pristine, workdir) -> str:
+    """Copy a generated database into ``workdir`` and return its URL"""
+    for suffix in ("", "-wal"):
+        if os.path.exists(str(pristine) + suffix):
+            shutil.copy(str(pristine) + suffix, os.path.join(workdir, "benchmark.db" + suffix))
+    return f"sqlite:///{workdir}/benchmark.db"
+
+
+def compare(current, baseline, tolerance):
+    """Print routes whose p95 regressed past ``tolerance``; return how many did"""
+    regressions = 0
+    for scale, results in current["scales"].items():
+        for name, result in results.items():
+            before = baseline.get("scales", {}).get(scale, {}).get(name)
+            if not before or not before["p95_ms"]:
+                continue
+            change = result["p95_ms"] / before["p95_ms"] - 1
+            if change > tolerance:
+                regressions += 1
+                print(f"REGRESSION {scale} {name}: p95 {before['p95_ms']}ms -> {result['p95_ms']}ms ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="1000,10000", help="comma-separated transfer counts")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per route")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--routes", default="", help="only routes whose name contains one of these (comma-separated)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "transfer-system-benchmarks"))
+    parser.add_argument("--output", default=str(BASELINE_DIR / "latest.json"))
+    parser.add_argument("--compare", help="baseline JSON to check against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown before failing")
+    parser.add_argument("--run-scale", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    routes_filter = [part for part in args.routes.split(",") if part]
+
+    if args.run_scale:
+        # Child process: DATABASE_URL is already set for this scale
+        results = asyncio.run(_run_scale(args.requests, args.concurrency, routes_filter))
+        Path(args.output).write_text(json.dumps(results))
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "scales": {},
+    }
+    # Each scale runs in its own process, since the engine binds to
+    # DATABASE_URL at import time
+    for scale in [int(part) for part in args.scales.split(",")]:
+        pristine = prepare(scale, args.data_dir, args.seed)
+        print(f"Scale {scale}", file=sys.stderr)
+        with tempfile.TemporaryDirectory() as workdir:
+            # Write routes run against a throwaway copy, so every run starts from the same data
+            url = working_copy(pristine, workdir)
+            output = os.path.join(workdir, "results.json")
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.api", "--run-scale", str(scale),
+                 "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                 "--routes", args.routes, "--output", output],
+                env={**os.environ, "DATABASE_URL": url}, check=True,
+            )
+            report["scales"][str(scale)] = json.loads(Path(output).read_text())
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(f"Wrote {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(report, baseline, args.tolerance):
+            sys.exit("p95 latency regressed past the tolerance")
+
+
+if __name__ == "__main__":
+    main()
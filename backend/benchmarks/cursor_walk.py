@@ -0,0 +1,115 @@
+"""Check that walking a list route by cursor returns every row exactly once.
+
+Fills a fresh database with transfers sharing whole-second timestamps in
+each of the forms SQLite ends up storing: the ORM's six-digit fraction,
+the bare seconds of the CURRENT_TIMESTAMP default, and real fractions.
+Then follows X-Next-Cursor through GET /atlas/transfers a few rows at a
+time, with and without a status filter, and exits non-zero unless the
+walk yields the same ids, in the same order, as a single full page.
+
+Run from backend/:
+    python -m benchmarks.cursor_walk
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+
+def _fill(rows_per_form: int):
+    from sqlalchemy import text
+
+    from database import SessionLocal
+    from models.transfer import Transfer
+
+    whole_second = datetime(2020, 1, 1, 12, 0, 0)
+    db = SessionLocal()
+    try:
+        number = 0
+
+        def transfer(created_at=None, status="pending"):
+            nonlocal number
+            number += 1
+            return Transfer(
+                reference_number=f"WALK-{number:05d}", customer_name="Cursor Walk", status=status,
+                from_institution="TD", account_number="1", account_type="RRSP", transfer_type="full",
+                transfer_amount=1, created_at=created_at,
+            )
+
+        for i in range(rows_per_form):
+            # Stored as "2020-01-01 12:00:00.000000"
+            db.add(transfer(whole_second, status="pending" if i % 2 else "completed"))
+            # Stored with a real fraction, in the same second
+            db.add(transfer(whole_second.replace(microsecond=(i + 1) * 1000)))
+        db.flush()
+        for i in range(rows_per_form):
+            # Stored as "2020-01-01 12:00:00", the way CURRENT_TIMESTAMP writes it
+            row = transfer()
+            db.add(row)
+            db.flush()
+            db.execute(
+                text("UPDATE transfers SET created_at = :created_at WHERE id = :id"),
+                {"created_at": whole_second.isoformat(sep=" "), "id": row.id},
+            )
+        db.commit()
+    finally:
+        db.close()
+
+
+async def _walk(page_size: int) -> list:
+    import httpx
+
+    from benchmarks.api import login
+    from main import app
+    from pagination import NEXT_CURSOR_HEADER
+
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await login(client)
+        for query in ("", "&status=pending"):
+            full = await client.get(f"/atlas/transfers?limit=10000{query}")
+            full.raise_for_status()
+            expected = [row["id"] for row in full.json()]
+
+            walked = []
+            cursor = None
+            while True:
+                url = f"/atlas/transfers?limit={page_size}{query}" + (f"&cursor={cursor}" if cursor else "")
+                response = await client.get(url)
+                response.raise_for_status()
+                walked += [row["id"] for row in response.json()]
+                cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                if not cursor or len(walked) > len(expected):
+                    break
+
+            label = f"GET /atlas/transfers{'?' + query[1:] if query else ''}"
+            print(f"  {label:40} {len(expected)} rows, walked {len(walked)}, {len(set(walked))} distinct")
+            if walked != expected:
+                missing = sorted(set(expected) - set(walked))
+                failures.append(f"{label}: walk differs from the full list; missing {missing[:10]}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20, help="rows per stored timestamp form")
+    parser.add_argument("--page-size", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/cursor_walk.db")
+    from startup import init_schema, seed_database
+
+    init_schema()
+    seed_database()
+    _fill(args.rows)
+    failures = asyncio.run(_walk(args.page_size))
+    if failures:
+        print("\n".join(failures))
+        sys.exit("cursor pagination skipped or repeated rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Check that other routes keep their latency while a burst of logins waits on bcrypt.
+
+Logins queue on the password pool; if they held their database
+connection meanwhile, a small DB pool would run dry and every other
+route would stall behind them. This fires ``--logins`` concurrent logins
+at a deliberately small DB pool and password pool, times
+GET /dashboard/stats throughout, and exits non-zero when its worst
+latency during the burst passes ``--max-ms``.
+
+Run from backend/:
+    python -m benchmarks.login_burst --logins 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+
+async def _burst(logins: int, max_ms: float) -> bool:
+    import httpx
+
+    from benchmarks.api import LOGIN, login
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        await login(client)
+
+        async def timed_stats():
+            started = time.perf_counter()
+            response = await client.get("/dashboard/stats")
+            response.raise_for_status()
+            return (time.perf_counter() - started) * 1000
+
+        quiet = [await timed_stats() for _ in range(5)]
+
+        async def one_login():
+            response = await client.post("/auth/login", json=LOGIN, headers={"Authorization": ""})
+            return response.status_code
+
+        burst = [asyncio.create_task(one_login()) for _ in range(logins)]
+        during = []
+        while not all(task.done() for task in burst):
+            during.append(await timed_stats())
+            await asyncio.sleep(0.05)
+        statuses = await asyncio.gather(*burst)
+
+    print(f"logins: {statuses.count(200)} ok, {len(statuses) - statuses.count(200)} rejected")
+    print(f"/dashboard/stats quiet: max {max(quiet):.1f}ms; during burst: {len(during)} requests, "
+          f"max {max(during, default=0):.1f}ms")
+    return max(during, default=0) <= max_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--max-ms", type=float, default=500, help="worst acceptable latency during the burst")
+    args = parser.parse_args()
+
+    # Small pools make a connection held across bcrypt show up at once
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/login_burst.db")
+    os.environ.setdefault("DB_POOL_SIZE", "5")
+    os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+    os.environ.setdefault("PASSWORD_POOL_WORKERS", "2")
+
+    from startup import init_schema, seed_database
+
+    init_schema()
+    seed_database()
+    if not asyncio.run(_burst(args.logins, args.max_ms)):
+        sys.exit(f"/dashboard/stats slowed past {args.max_ms:.0f}ms during the login burst")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Check every benchmarked route against its recorded SQL statement budget.
+
+Drives each route of benchmarks/api.py a few times in-process with
+QUERY_BUDGET_MODE=enforce and exits non-zero if any of them ran more
+statements than query_budgets.json allows. With --record the budgets
+are (re)captured instead; commit the file when a route legitimately
+needs more queries.
+
+Run from backend/:
+    python -m benchmarks.query_budgets
+    python -m benchmarks.query_budgets --record
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+from benchmarks.api import load_sample, login, prepare, routes, working_copy
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "query_budgets.json")
+
+
+async def _check(repeats: int) -> list:
+    import httpx
+
+    from database import AsyncSessionLocal
+    from main import app
+    from query_debug import BUDGET_HEADER, STATEMENTS_HEADER
+    from startup import init_schema
+    from transfer_cache import transfer_cache
+
+    # ASGITransport sends no lifespan events, so bring a cached database's schema up to date here
+    init_schema()
+    async with AsyncSessionLocal() as db:
+        sample = await load_sample(db)
+
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await login(client)
+        for name, factory in routes(sample).items():
+            # Budgets cover the cold path, not rows an earlier route happened to cache
+            transfer_cache.clear()
+            used = 0
+            for i in range(repeats):
+                method, path, body = factory(i)
+                response = await client.request(method, path, json=body)
+                used = max(used, int(response.headers.get(STATEMENTS_HEADER, 0)))
+                if response.status_code == 500 and "Query budget exceeded" in response.text:
+                    failures.append(f"{name}: {response.json()['detail']}")
+                    break
+                if response.status_code >= 500:
+                    failures.append(f"{name}: HTTP {response.status_code}")
+                    break
+            print(f"  {name:34} {used} statements (budget {response.headers.get(BUDGET_HEADER, '-')})")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", action="store_true", help="rewrite the budgets instead of checking them")
+    parser.add_argument("--transfers", type=int, default=500)
+    parser.add_argument("--repeats", type=int, default=5, help="requests per route")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "transfer-system-benchmarks"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    pristine = prepare(args.transfers, args.data_dir, seed=1)
+    workdir = tempfile.mkdtemp()
+    if args.record and os.path.exists(BUDGET_FILE):
+        os.remove(BUDGET_FILE)
+    # The app reads these at import time
+    os.environ["DATABASE_URL"] = working_copy(pristine, workdir)
+    os.environ["QUERY_BUDGET_MODE"] = "record" if args.record else "enforce"
+    os.environ["QUERY_BUDGET_FILE"] = BUDGET_FILE
+    os.environ["QUERY_DEBUG_HEADERS"] = "true"
+
+    failures = asyncio.run(_check(args.repeats))
+    if args.record:
+        print(f"Recorded budgets in {BUDGET_FILE}")
+    elif failures:
+        print("\n".join(failures))
+        sys.exit(f"{len(failures)} route(s) over their query budget")
+
+
+if __name__ == "__main__":
+    main()
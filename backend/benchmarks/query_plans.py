@@ -0,0 +1,110 @@
+"""Check that every list route's queries read through an index, in order.
+
+Requests each paginated list route in-process, with and without its
+filters and with and without a cursor, captures the SELECTs it runs and
+asks SQLite for their EXPLAIN QUERY PLAN. Exits non-zero if any plan
+scans a table without an index or sorts with a temp b-tree, which is
+what a missing or unusable composite index looks like.
+
+Run from backend/:
+    python -m benchmarks.query_plans
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+import tempfile
+
+from benchmarks.api import login, prepare, working_copy
+
+# path -> the filters each is also requested with
+LIST_ROUTES = {
+    "/atlas/transfers": ["status=pending"],
+    "/atlas/mismatches": ["field=account_number"],
+    "/t2220/forms": ["verified=true", "verified=false"],
+    "/zendesk/tickets": ["status=open", "priority=high", "assigned_to_me=true"],
+    "/jira/tickets": ["status=To Do"],
+    "/users/": [],
+}
+PAGE_SIZE = 5
+# "SCAN <table>" alone reads every row; "SCAN <table> USING INDEX" walks an index in order
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?\w+$")
+TEMP_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+
+def _problems(plan: list) -> list:
+    return [detail for detail in plan if FULL_SCAN.match(detail) or TEMP_SORT in detail]
+
+
+async def _check() -> list:
+    import httpx
+    from sqlalchemy import event
+
+    from database import async_engine, engine
+    from main import app
+    from pagination import NEXT_CURSOR_HEADER
+    from startup import init_schema
+
+    # ASGITransport sends no lifespan events, so bring a cached database's schema up to date here
+    init_schema()
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "ORDER BY" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await login(client)
+        for path, filters in LIST_ROUTES.items():
+            for query in ["", *filters]:
+                url = f"{path}?limit={PAGE_SIZE}" + (f"&{query}" if query else "")
+                captured.clear()
+                # A non-matching If-None-Match also runs the ETag query, where the route has one
+                response = await client.get(url, headers={"If-None-Match": '"plan-check"'})
+                response.raise_for_status()
+                cursor = response.headers.get(NEXT_CURSOR_HEADER)
+                if cursor:
+                    response = await client.get(
+                        f"{url}&cursor={cursor}", headers={"If-None-Match": '"plan-check"'},
+                    )
+                    response.raise_for_status()
+
+                label = f"GET {url}" + (" (+cursor)" if cursor else "")
+                bad = []
+                with engine.connect() as connection:
+                    for statement, parameters in captured:
+                        plan = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                        bad.extend(_problems([row[-1] for row in plan]))
+                print(f"  {label:60} {len(captured)} statements  {'; '.join(bad) or 'ok'}")
+                if bad:
+                    failures.append(f"{label}: {'; '.join(bad)}")
+
+    event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transfers", type=int, default=500)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "transfer-system-benchmarks"))
+    args = parser.parse_args()
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    pristine = prepare(args.transfers, args.data_dir, seed=1)
+    # The app reads this at import time
+    os.environ["DATABASE_URL"] = working_copy(pristine, tempfile.mkdtemp())
+
+    failures = asyncio.run(_check())
+    if failures:
+        print("\n".join(failures))
+        sys.exit(f"{len(failures)} list quer{'y' if len(failures) == 1 else 'ies'} without an index-ordered plan")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Compare the response-model path with the lean path for list pages.
+
+"response_model" is what the list routes did before: load ORM objects,
+validate them into the pydantic response model, dump in JSON mode and
+encode with json.dumps, as FastAPI does. "lean" is the current path:
+select the same columns, build dicts and encode with orjson. Both include
+the query. Each page is checked to decode to the same JSON either way.
+
+Run from backend/:
+    python -m benchmarks.serialization --limits 100,500,1000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+
+def _time(fn, repeats):
+    fn()  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeats):
+        body = fn()
+    return (time.perf_counter() - started) / repeats * 1000, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--limits", default="100,500,1000")
+    parser.add_argument("--repeats", type=int, default=30)
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "transfer-system-benchmarks"))
+    args = parser.parse_args()
+
+    from benchmarks.api import prepare
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    os.environ["DATABASE_URL"] = f"sqlite:///{prepare(args.transfers, args.data_dir, seed=1)}"
+
+    from pydantic import TypeAdapter
+    from sqlalchemy import select
+
+    from database import SessionLocal
+    from models.transfer import Transfer
+    from models.zendesk_ticket import ZendeskTicket
+    from models.jira_ticket import JiraTicket
+    from models.t2220_form import T2220Form
+    from schemas.transfer import TransferResponse
+    from schemas.zendesk_ticket import ZendeskTicketResponse
+    from schemas.jira_ticket import JiraTicketResponse
+    from schemas.t2220_form import T2220FormResponse
+    from serialization import FastJSONResponse, rows_to_dicts, schema_columns
+
+    db = SessionLocal()
+    print(f"{'model':15} {'limit':>6} {'response_model':>16} {'lean':>10} {'speedup':>8}")
+    for model, schema in (
+        (Transfer, TransferResponse),
+        (ZendeskTicket, ZendeskTicketResponse),
+        (JiraTicket, JiraTicketResponse),
+        (T2220Form, T2220FormResponse),
+    ):
+        adapter = TypeAdapter(List[schema])
+        order = (model.created_at.desc(), model.id.desc())
+        for limit in [int(part) for part in args.limits.split(",")]:
+            def response_model_path():
+                objects = db.execute(select(model).order_by(*order).limit(limit)).scalars().all()
+                content = adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+                # Requests start with an empty session, so do not let the identity map help
+                db.expunge_all()
+                return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+            def lean_path():
+                rows = db.execute(select(*schema_columns(model, schema)).order_by(*order).limit(limit)).all()
+                return FastJSONResponse(rows_to_dicts(rows)).body
+
+            before, expected = _time(response_model_path, args.repeats)
+            after, actual = _time(lean_path, args.repeats)
+            if json.loads(expected) != json.loads(actual):
+                raise SystemExit(f"{model.__name__} limit {limit}: lean output differs from the response model")
+            print(f"{model.__name__:15} {limit:>6} {before:>14.2f}ms {after:>8.2f}ms {before / after:>7.1f}x")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Create tickets from many threads and coroutines at once, check every
+identifier is unique and report tickets created per second.
+
+Each simulated worker gets its own allocator, the way separate uvicorn
+processes would, and all of them share one database. Threads draw
+identifiers with next_value(); coroutines, like the API routes, with
+next_value_async() on one event loop.
+
+Run from backend/:
+    python -m benchmarks.ticket_ids --tickets 5000 --threads 32 --coroutines 32 --workers 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+
+def _report(label, allocators, keys, rejected, rate) -> int:
+    """Print a run's results; return how many tickets did not get a unique identifier"""
+    leases = sum(allocator.leases for allocator in allocators)
+    print(f"{label}: {len(keys)} tickets, {len(set(keys))} unique, {rejected} rejected as duplicates, "
+          f"{leases} block leases, {rate:.0f} tickets/s")
+    return rejected + len(keys) - len(set(keys))
+
+
+def run(label, allocators, count, threads, new_ticket, session_factory, key_column):
+    """Insert ``count`` tickets from ``threads`` threads; return how many did not get a unique identifier"""
+    rejected = []
+
+    def create(i):
+        db = session_factory()
+        try:
+            db.add(new_ticket(i, allocators[i % len(allocators)].next_value()))
+            db.commit()
+        except IntegrityError:
+            # A reused identifier hit the unique constraint; count it and carry on
+            db.rollback()
+            rejected.append(i)
+        finally:
+            db.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(create, range(count)))
+    rate = count / (time.perf_counter() - started)
+
+    db = session_factory()
+    keys = [key for (key,) in db.query(key_column)]
+    db.close()
+    return _report(label, allocators, keys, len(rejected), rate)
+
+
+async def run_async(label, allocators, count, coroutines, new_ticket, session_factory, key_column):
+    """Insert ``count`` tickets from ``coroutines`` tasks on one event loop; return how many did not get a unique identifier"""
+    rejected = []
+    numbers = iter(range(count))
+
+    async def worker():
+        for i in numbers:
+            async with session_factory() as db:
+                db.add(new_ticket(i, await allocators[i % len(allocators)].next_value_async()))
+                try:
+                    await db.commit()
+                except IntegrityError:
+                    await db.rollback()
+                    rejected.append(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(coroutines)))
+    rate = count / (time.perf_counter() - started)
+
+    async with session_factory() as db:
+        keys = (await db.execute(select(key_column))).scalars().all()
+    return _report(label, allocators, keys, len(rejected), rate)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickets", type=int, default=5000, help="per run")
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--coroutines", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=4, help="simulated processes, one allocator each")
+    parser.add_argument("--block-size", type=int, default=50)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/ticket_ids.db")
+    from database import AsyncSessionLocal, Base, SessionLocal, engine
+    from models.jira_ticket import JiraTicket
+    from models.zendesk_ticket import ZendeskTicket
+    from routers.jira import _first_unused_key_number
+    from routers.zendesk import _first_unused_ticket_number
+    from sequences import BlockSequence
+
+    Base.metadata.create_all(bind=engine)
+
+    kinds = [
+        (
+            "jira",
+            lambda: BlockSequence("jira_ticket_key", args.block_size, _first_unused_key_number),
+            lambda i, n: JiraTicket(ticket_key=f"XFER-{n}", summary=f"Benchmark escalation {i}", description=""),
+            JiraTicket.ticket_key,
+        ),
+        (
+            "zendesk",
+            lambda: BlockSequence("zendesk_ticket_number", args.block_size, _first_unused_ticket_number),
+            lambda i, n: ZendeskTicket(
+                ticket_number=f"ZEN-{n:06d}",
+                customer_name="Benchmark Customer",
+                customer_email="benchmark@email.com",
+                subject=f"Benchmark ticket {i}",
+                description="",
+            ),
+            ZendeskTicket.ticket_number,
+        ),
+    ]
+    failures = sum(
+        run(
+            f"{label} (threads)", [allocator() for _ in range(args.workers)],
+            args.tickets, args.threads, new_ticket, SessionLocal, key_column,
+        )
+        for label, allocator, new_ticket, key_column in kinds
+    )
+
+    async def run_all_async():
+        # One event loop for every async run: the async engine's pool is bound to it.
+        # Fresh allocators, as after a restart, continue above the threads' blocks.
+        return sum([
+            await run_async(
+                f"{label} (async)", [allocator() for _ in range(args.workers)],
+                args.tickets, args.coroutines, new_ticket, AsyncSessionLocal, key_column,
+            )
+            for label, allocator, new_ticket, key_column in kinds
+        ])
+
+    failures += asyncio.run(run_all_async())
+    if failures:
+        sys.exit("duplicate or missing ticket identifiers")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Set-based bulk updates for transfers and tickets.
+
+A bulk request names rows by id, by a filter, or both, and the fields to
+set. The matching rows are read once (locked on Postgres) and every row
+that would actually change is updated with a single UPDATE, in one
+transaction. The ORM never sees these rows, so the dashboard counters
+and change events its hooks maintain are applied here instead.
+"""
+import os
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+
+from counters import apply_deltas, count_updates
+from events import TRACKED_MODELS, broker
+
+BULK_UPDATE_MAX_ROWS = int(os.getenv("BULK_UPDATE_MAX_ROWS", "10000"))
+
+
+def filter_conditions(model, bulk_filter) -> list:
+    """Equality conditions for the fields set on a bulk request's filter"""
+    if bulk_filter is None:
+        return []
+    criteria = bulk_filter.model_dump(exclude_unset=True)
+    if not criteria:
+        raise HTTPException(status_code=400, detail="Filter needs at least one field")
+    return [getattr(model, name) == value for name, value in criteria.items()]
+
+
+async def bulk_update(
+    db,
+    model,
+    ids: Optional[List[int]],
+    conditions: list,
+    values: dict,
+    extra_values: Optional[dict] = None,
+) -> dict:
+    """Set ``values`` on the rows picked by ``ids`` and ``conditions`` with one UPDATE, and commit.
+
+    ``extra_values`` are SET alongside but are not compared, e.g.
+    expressions of the old row. Every requested or matched id is reported
+    as "updated", "unchanged" (already had these values), "filtered_out"
+    (exists but does not match the filter) or "not_found".
+    """
+    if ids is None and not conditions:
+        raise HTTPException(status_code=400, detail="Give ids, a filter, or both")
+    if not values:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    if ids is not None and len(ids) > BULK_UPDATE_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_UPDATE_MAX_ROWS} ids per request")
+
+    query = select(model.id, *(getattr(model, name) for name in values)).where(*conditions)
+    if ids is not None:
+        query = query.where(model.id.in_(ids))
+    if db.bind.dialect.name == "postgresql":
+        # Concurrent writers wait, so the old values the counters are moved from stay true
+        query = query.with_for_update()
+    rows = (await db.execute(query.order_by(model.id).limit(BULK_UPDATE_MAX_ROWS + 1))).all()
+    if len(rows) > BULK_UPDATE_MAX_ROWS:
+        raise HTTPException(
+            status_code=400, detail=f"More than {BULK_UPDATE_MAX_ROWS} rows match; narrow the filter",
+        )
+
+    filtered_out = []
+    if ids is not None and conditions and len(rows) < len(set(ids)):
+        # Only a lookup without the filter tells a filtered-out row from a missing one
+        matched = {row.id for row in rows}
+        result = await db.execute(select(model.id).where(model.id.in_([row_id for row_id in ids if row_id not in matched])))
+        filtered_out = result.scalars().all()
+
+    changed = [row for row in rows if any(getattr(row, name) != value for name, value in values.items())]
+    changed_ids = [row.id for row in changed]
+    if changed_ids:
+        await db.execute(
+            update(model).where(model.id.in_(changed_ids)).values(**values, **(extra_values or {}))
+            .execution_options(synchronize_session=False)
+        )
+        deltas = count_updates(model, [row._mapping for row in changed], values)
+        await db.run_sync(lambda session: apply_deltas(session.connection(), deltas))
+    await db.commit()
+
+    if changed_ids and model in TRACKED_MODELS:
+        queue, prefix, _ = TRACKED_MODELS[model]
+        # One event for the batch, so a large update cannot overflow subscriber queues
+        broker.publish(queue, f"{prefix}.bulk_updated", {
+            "ids": changed_ids, "changed": list(values), "at": datetime.utcnow().isoformat(),
+        })
+
+    outcomes = {row.id: "unchanged" for row in rows}
+    outcomes.update((row_id, "updated") for row_id in changed_ids)
+    outcomes.update((row_id, "filtered_out") for row_id in filtered_out)
+    for row_id in ids or ():
+        outcomes.setdefault(row_id, "not_found")
+    return {
+        "matched": len(rows),
+        "updated": len(changed_ids),
+        "results": [{"id": row_id, "outcome": outcome} for row_id, outcome in outcomes.items()],
+    }
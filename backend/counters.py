@@ -0,0 +1,219 @@
+"""Dashboard counters maintained as rows change.
+
+dashboard_counters holds one row per (metric, bucket), such as
+("transfers.status", "pending") -> 1234, so the dashboard reads a few
+dozen rows whatever the size of the tables. A Session hook applies the
+deltas of every ORM insert, update and delete in the same transaction as
+the write; bulk Core writes apply their own, from add_rows() or
+count_updates().
+
+reconcile_counters() recounts everything from the tables. It runs when
+the schema is applied, every COUNTER_RECONCILE_SECONDS in the API, and
+from the command line (``python counters.py``), repairing drift from
+writes made outside the app.
+"""
+import asyncio
+import os
+from collections import Counter
+
+from sqlalchemy import delete, event, func, inspect, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from database import engine
+from models.transfer import Transfer
+from models.t2220_form import T2220Form
+from models.zendesk_ticket import ZendeskTicket
+from models.jira_ticket import JiraTicket
+from models.dashboard_counter import DashboardCounter
+
+# 0 turns the periodic reconciliation off
+COUNTER_RECONCILE_SECONDS = float(os.getenv("COUNTER_RECONCILE_SECONDS", "3600"))
+
+# metric -> (model, counted column)
+COUNTERS = {
+    "transfers.status": (Transfer, "status"),
+    "zendesk_tickets.status": (ZendeskTicket, "status"),
+    "zendesk_tickets.priority": (ZendeskTicket, "priority"),
+    "jira_tickets.status": (JiraTicket, "status"),
+    "t2220_forms.verified": (T2220Form, "verified"),
+}
+JIRA_CLOSED_STATUSES = ("Done",)
+
+_METRICS_BY_MODEL = {}
+for _metric, (_model, _column) in COUNTERS.items():
+    _METRICS_BY_MODEL.setdefault(_model, []).append((_metric, _column))
+
+
+def _bucket(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "none" if value is None else str(value)
+
+
+def _column_default(model, name):
+    default = model.__table__.c[name].default
+    return default.arg if default is not None and default.is_scalar else None
+
+
+def count_rows(model, rows) -> Counter:
+    """Counter deltas for inserting ``rows``, dicts as passed to a Core insert"""
+    deltas = Counter()
+    for metric, name in _METRICS_BY_MODEL.get(model, ()):
+        default = _column_default(model, name)
+        for row in rows:
+            deltas[(metric, _bucket(row.get(name, default)))] += 1
+    return deltas
+
+
+def count_updates(model, rows, values: dict) -> Counter:
+    """Counter deltas for setting ``values`` on ``rows``, mappings holding their current values"""
+    deltas = Counter()
+    for metric, name in _METRICS_BY_MODEL.get(model, ()):
+        if name not in values:
+            continue
+        for row in rows:
+            deltas[(metric, _bucket(row[name]))] -= 1
+            deltas[(metric, _bucket(values[name]))] += 1
+    return deltas
+
+
+def counter_upserts(dialect: str, deltas) -> list:
+    """Statements adding ``deltas`` to the stored counters.
+
+    Rows are upserted in key order so concurrent writers lock them in the
+    same order. Dialects without an upsert get none; reconciliation
+    catches them up.
+    """
+    values = [
+        {"metric": metric, "bucket": bucket, "value": delta}
+        for (metric, bucket), delta in sorted(deltas.items()) if delta
+    ]
+    if not values or dialect not in ("sqlite", "postgresql"):
+        return []
+    statement = (sqlite.insert if dialect == "sqlite" else postgresql.insert)(DashboardCounter).values(values)
+    return [statement.on_conflict_do_update(
+        index_elements=[DashboardCounter.metric, DashboardCounter.bucket],
+        set_={"value": DashboardCounter.value + statement.excluded.value},
+    )]
+
+
+def apply_deltas(connection, deltas):
+    for statement in counter_upserts(connection.dialect.name, deltas):
+        connection.execute(statement)
+
+
+def add_rows(connection, model, rows):
+    """Count rows written with a bulk Core insert, which the Session hook never sees"""
+    apply_deltas(connection, count_rows(model, rows))
+
+
+@event.listens_for(Session, "after_flush")
+def _count_after_flush(session, flush_context):
+    deltas = Counter()
+    for obj in session.new:
+        state = inspect(obj)
+        for metric, name in _METRICS_BY_MODEL.get(type(obj), ()):
+            deltas[(metric, _bucket(state.dict.get(name)))] += 1
+    for obj in session.deleted:
+        state = inspect(obj)
+        for metric, name in _METRICS_BY_MODEL.get(type(obj), ()):
+            history = state.attrs[name].history
+            value = history.deleted[0] if history.deleted else state.dict.get(name)
+            deltas[(metric, _bucket(value))] -= 1
+    for obj in session.dirty:
+        state = inspect(obj)
+        for metric, name in _METRICS_BY_MODEL.get(type(obj), ()):
+            history = state.attrs[name].history
+            # Without the old value there is nothing safe to move; reconciliation fixes it
+            if history.added and history.deleted:
+                deltas[(metric, _bucket(history.deleted[0]))] -= 1
+                deltas[(metric, _bucket(history.added[0]))] += 1
+    apply_deltas(session.connection(), deltas)
+
+
+def recount(connection) -> Counter:
+    counts = Counter()
+    for metric, (model, name) in COUNTERS.items():
+        column = getattr(model, name)
+        for value, count in connection.execute(select(column, func.count()).group_by(column)):
+            counts[(metric, _bucket(value))] += count
+    return counts
+
+
+def reconcile_counters(connection) -> dict:
+    """Replace the stored counters with a fresh count; returns the corrections made"""
+    if connection.dialect.name == "postgresql":
+        # Writers wait at their counter upsert until the recount commits, so none is lost
+        connection.execute(text(f"LOCK TABLE {DashboardCounter.__tablename__} IN EXCLUSIVE MODE"))
+    # Deleting first also takes SQLite's write lock before the recount reads
+    stored = Counter({
+        (metric, bucket): value
+        for metric, bucket, value in connection.execute(
+            delete(DashboardCounter).returning(DashboardCounter.metric, DashboardCounter.bucket, DashboardCounter.value)
+        )
+    })
+    actual = recount(connection)
+    if actual:
+        connection.execute(insert(DashboardCounter), [
+            {"metric": metric, "bucket": bucket, "value": value} for (metric, bucket), value in sorted(actual.items())
+        ])
+    return {
+        f"{metric}:{bucket}": actual[(metric, bucket)] - stored[(metric, bucket)]
+        for metric, bucket in sorted(set(stored) | set(actual))
+        if actual[(metric, bucket)] != stored[(metric, bucket)]
+    }
+
+
+def reconcile() -> dict:
+    with engine.begin() as connection:
+        corrections = reconcile_counters(connection)
+    if corrections:
+        print(f"Dashboard counters corrected: {corrections}")
+    return corrections
+
+
+async def reconcile_periodically(interval: float):
+    """Reconcile every ``interval`` seconds, off the event loop"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(reconcile)
+        except Exception as exc:
+            print(f"Dashboard counter reconciliation failed: {exc}")
+
+
+def read_counters(rows) -> dict:
+    """Dashboard stats from (metric, bucket, value) counter rows"""
+    counts = {metric: {} for metric in COUNTERS}
+    for metric, bucket, value in rows:
+        if metric in counts and value:
+            counts[metric][bucket] = value
+    jira_by_status = counts["jira_tickets.status"]
+    forms = counts["t2220_forms.verified"]
+    return {
+        "transfers": {
+            "total": sum(counts["transfers.status"].values()),
+            "by_status": counts["transfers.status"],
+        },
+        "zendesk_tickets": {
+            "total": sum(counts["zendesk_tickets.status"].values()),
+            "by_status": counts["zendesk_tickets.status"],
+            "by_priority": counts["zendesk_tickets.priority"],
+        },
+        "jira_tickets": {
+            "total": sum(jira_by_status.values()),
+            "open": sum(value for status, value in jira_by_status.items() if status not in JIRA_CLOSED_STATUSES),
+            "by_status": jira_by_status,
+        },
+        "t2220_forms": {
+            "total": sum(forms.values()),
+            "verified": forms.get("true", 0),
+            "unverified": sum(value for bucket, value in forms.items() if bucket != "true"),
+        },
+    }
+
+
+if __name__ == "__main__":
+    if not reconcile():
+        print("Dashboard counters already match the tables")
@@ -1,24 +1,115 @@
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.sql.expression import FunctionElement
 import os
 
+from pool_telemetry import PoolTelemetry, TimedAsyncAdaptedQueuePool
+
 # Use SQLite for development, PostgreSQL for production
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./transfer_system.db")
 
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+
+def _async_url(url: str) -> str:
+    """Same database, through an asyncio driver (aiosqlite / asyncpg)"""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for scheme in ("postgresql://", "postgres://"):
+        if url.startswith(scheme):
+            return "postgresql+asyncpg://" + url[len(scheme):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", _async_url(DATABASE_URL))
+
+# Connection pool sizing, per process
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800")),
+}
+
+# Memory-mapped I/O for SQLite reads; 0 disables it
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+# In-memory SQLite needs its single-connection pools, so leave those alone;
+# each connection to it is a separate, empty database
+IS_SQLITE_MEMORY = IS_SQLITE and (":memory:" in DATABASE_URL or DATABASE_URL.rstrip("/") == "sqlite:")
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside a writer instead of queueing behind it
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cursor.close()
+
+
+def make_engine(**options):
+    """Sync engine on DATABASE_URL with the app's connect args, pool sizing and SQLite pragmas"""
+    if IS_SQLITE_MEMORY:
+        return create_engine(DATABASE_URL, connect_args={"check_same_thread": False}, **options)
+    if IS_SQLITE:
+        made = create_engine(
+            DATABASE_URL, connect_args={"check_same_thread": False}, **{**POOL_OPTIONS, **options}
+        )
+        event.listen(made, "connect", _set_sqlite_pragmas)
+        return made
+    return create_engine(DATABASE_URL, **{**POOL_OPTIONS, **options})
+
+
+def make_async_engine(**options):
+    """Async engine on ASYNC_DATABASE_URL, configured like make_engine()"""
+    if IS_SQLITE_MEMORY:
+        return create_async_engine(ASYNC_DATABASE_URL, **options)
+    # aiosqlite defaults to NullPool, which reopens the file on every request
+    made = create_async_engine(
+        ASYNC_DATABASE_URL, **{"poolclass": TimedAsyncAdaptedQueuePool, **POOL_OPTIONS, **options}
+    )
+    if IS_SQLITE:
+        event.listen(made.sync_engine, "connect", _set_sqlite_pragmas)
+    return made
+
+
+# The sync engine serves schema setup, seeding and maintenance scripts;
+# request handlers use the async engine
+engine = make_engine()
+async_engine = make_async_engine()
+
+pool_telemetry = PoolTelemetry(async_engine.sync_engine.pool)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False)
 
 Base = declarative_base()
 
 
-def get_db():
-    db = SessionLocal()
-    try:
+class precise_now(FunctionElement):
+    """now() with sub-second precision on every backend, for updated_at columns.
+
+    SQLite's CURRENT_TIMESTAMP stops at whole seconds, so two updates in
+    the same second would leave updated_at (and the ETags built on it) unchanged.
+    """
+    type = DateTime(timezone=True)
+    inherit_cache = True
+
+
+@compiles(precise_now)
+def _precise_now(element, compiler, **kw):
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(precise_now, "sqlite")
+def _precise_now_sqlite(element, compiler, **kw):
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+async def get_db():
+    # The session checks a connection out at its first query and returns it
+    # when the transaction ends, so routes answered from caches never take one
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -0,0 +1,158 @@
+"""Change events for the /events/stream Server-Sent Events channel.
+
+Committed inserts, updates and deletes of transfers, T2220 forms, Zendesk
+tickets and JIRA tickets are turned into events on the "atlas", "t2220",
+"zendesk" and "jira" queues by Session hooks, so every write route
+publishes without extra code. Bulk Core writes call publish() themselves.
+
+The broker is in-process: each API worker only sees its own writes.
+Subscribers get a bounded queue; one that falls behind is cut off with a
+"resync" event, telling the client to refetch and reconnect, instead of
+letting its backlog grow.
+"""
+import asyncio
+import os
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from models.transfer import Transfer
+from models.t2220_form import T2220Form
+from models.zendesk_ticket import ZendeskTicket
+from models.jira_ticket import JiraTicket
+
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENTS_SUBSCRIBER_QUEUE_SIZE", "256"))
+# Recent events kept for clients reconnecting with Last-Event-ID
+REPLAY_BUFFER_SIZE = int(os.getenv("EVENTS_REPLAY_BUFFER_SIZE", "1000"))
+
+# model -> (queue, event prefix, fields sent with every event)
+TRACKED_MODELS = {
+    Transfer: ("atlas", "transfer", ("reference_number", "status")),
+    T2220Form: ("t2220", "t2220_form", ("form_number", "transfer_id", "verified")),
+    ZendeskTicket: ("zendesk", "zendesk_ticket", ("ticket_number", "status", "priority", "assigned_agent_id", "transfer_id")),
+    JiraTicket: ("jira", "jira_ticket", ("ticket_key", "status", "priority", "assignee", "zendesk_ticket_id", "transfer_id")),
+}
+QUEUES = tuple(queue for queue, _, _ in TRACKED_MODELS.values())
+
+
+class Subscriber:
+    def __init__(self, queues: set):
+        self.queues = queues
+        self.events = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.lagged = False
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers = set()
+        self._recent = deque(maxlen=REPLAY_BUFFER_SIZE)
+        self._next_id = 1
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def subscribe(self, queues: set, last_event_id: Optional[int] = None) -> Subscriber:
+        """Register a subscriber; must be called on the event loop.
+
+        With ``last_event_id`` the buffered events after it are queued first.
+        When they cannot all be replayed the subscriber is returned lagged
+        and unregistered, so its stream ends with "resync".
+        """
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber(queues)
+        if last_event_id is not None:
+            oldest = self._recent[0]["id"] if self._recent else self._next_id
+            if not oldest - 1 <= last_event_id < self._next_id:
+                # Missed events already left the buffer, or the id is from
+                # another worker or before a restart: replay cannot cover it
+                subscriber.lagged = True
+                return subscriber
+            for item in self._recent:
+                if item["id"] > last_event_id and item["queue"] in queues:
+                    try:
+                        subscriber.events.put_nowait(item)
+                    except asyncio.QueueFull:
+                        subscriber.lagged = True
+                        self.dropped_subscribers += 1
+                        return subscriber
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, queue: str, event_type: str, data: dict):
+        """Queue an event for subscribers; safe to call from any thread"""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(queue, event_type, data)
+        elif not loop.is_closed():
+            loop.call_soon_threadsafe(self._deliver, queue, event_type, data)
+
+    def _deliver(self, queue: str, event_type: str, data: dict):
+        item = {"id": self._next_id, "queue": queue, "type": event_type, "data": data}
+        self._next_id += 1
+        self._recent.append(item)
+        self.published += 1
+        for subscriber in list(self._subscribers):
+            if queue not in subscriber.queues:
+                continue
+            try:
+                subscriber.events.put_nowait(item)
+            except asyncio.QueueFull:
+                subscriber.lagged = True
+                self.dropped_subscribers += 1
+                self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers,
+            "last_event_id": self._next_id - 1,
+        }
+
+
+broker = EventBroker()
+
+
+def _describe(obj, action: str) -> tuple:
+    queue, prefix, fields = TRACKED_MODELS[type(obj)]
+    state = inspect(obj)
+    data = {"id": obj.id, **{name: state.dict.get(name) for name in fields}}
+    if action == "updated":
+        data["changed"] = [
+            column.key for column in state.mapper.column_attrs if state.attrs[column.key].history.has_changes()
+        ]
+    data["at"] = datetime.utcnow().isoformat()
+    return queue, f"{prefix}.{action}", data
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session, flush_context):
+    # Values are read now, while they are still loaded; commit expires them
+    pending = session.info.setdefault("pending_events", [])
+    for action, objects in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objects:
+            if type(obj) in TRACKED_MODELS and (action != "updated" or session.is_modified(obj)):
+                pending.append(_describe(obj, action))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session):
+    for queue, event_type, data in session.info.pop("pending_events", ()):
+        broker.publish(queue, event_type, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session):
+    session.info.pop("pending_events", None)
@@ -0,0 +1,284 @@
+"""Generate large synthetic datasets for load-testing the API locally.
+
+Transfers are paired with T2220 forms following the training scenarios
+seeded by startup.py (clean match, account number mismatch, and so on),
+in a configurable mix. A share of transfers get Zendesk tickets, and a
+share of those are escalated to JIRA. Rows are written with bulk
+inserts, one transaction per batch, and transfer_mismatches and the
+dashboard counters are kept up to date batch by batch. The database
+assigns every id, so its sequences stay ahead of the rows and the API
+can keep inserting alongside.
+
+Run from backend/:
+    python generate_data.py --transfers 1000000
+    python generate_data.py --transfers 50000 --mix clean=0.5,account_number=0.5 --seed 7
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import Integer, cast, func, insert, select
+
+from database import SessionLocal, engine
+from models.user import User
+from models.transfer import Transfer
+from models.t2220_form import T2220Form
+from models.zendesk_ticket import ZendeskTicket
+from models.jira_ticket import JiraTicket
+from counters import add_rows
+from mismatches import refresh_mismatches
+from routers.jira import _first_unused_key_number
+from routers.zendesk import _first_unused_ticket_number
+from sequences import BlockSequence
+from startup import init_schema, seed_database
+
+INSTITUTIONS = ["TD Bank", "RBC Royal Bank", "Scotiabank", "BMO", "CIBC", "National Bank", "Desjardins"]
+ACCOUNT_TYPES = ["RRSP", "TFSA", "Non-Registered", "RESP"]
+FIRST_NAMES = ["Michael", "Jennifer", "Robert", "Amanda", "Christopher", "Emily", "James", "Sarah", "David", "Maria"]
+LAST_NAMES = ["Thompson", "Wilson", "Martinez", "Lee", "Brown", "Davis", "Anderson", "Mitchell", "Chen", "Garcia"]
+
+TRANSFER_STATUSES = {"pending": 0.5, "processing": 0.2, "completed": 0.2, "failed": 0.05, "rejected": 0.05}
+TICKET_STATUSES = {"open": 0.4, "in_progress": 0.25, "pending": 0.15, "resolved": 0.15, "closed": 0.05}
+TICKET_PRIORITIES = {"low": 0.2, "normal": 0.45, "high": 0.25, "urgent": 0.1}
+JIRA_STATUSES = {"To Do": 0.5, "In Progress": 0.3, "Done": 0.2}
+JIRA_PRIORITIES = {"Low": 0.2, "Medium": 0.5, "High": 0.2, "Critical": 0.1}
+
+
+def _other(rng, choices, current):
+    return rng.choice([choice for choice in choices if choice != current])
+
+
+# Each scenario turns a transfer into the values on its T2220 form,
+# mirroring the hand-written scenarios in startup.seed_transfers_and_forms
+def _clean(rng, transfer):
+    return {}
+
+
+def _account_number(rng, transfer):
+    last_digit = str((int(transfer["account_number"][-1]) + 1) % 10)
+    return {"account_number_on_form": transfer["account_number"][:-1] + last_digit}
+
+
+def _account_type(rng, transfer):
+    return {"account_type_on_form": _other(rng, ACCOUNT_TYPES, transfer["account_type"])}
+
+
+def _transfer_amount(rng, transfer):
+    return {"transfer_amount_on_form": transfer["transfer_amount"] + Decimal(rng.choice([1000, 2500, 10000]))}
+
+
+def _transfer_type(rng, transfer):
+    return {"transfer_type_on_form": _other(rng, ["full", "partial"], transfer["transfer_type"])}
+
+
+def _account_type_and_amount(rng, transfer):
+    return {**_account_type(rng, transfer), **_transfer_amount(rng, transfer)}
+
+
+SCENARIOS = {
+    "clean": _clean,
+    "account_number": _account_number,
+    "account_type": _account_type,
+    "transfer_amount": _transfer_amount,
+    "transfer_type": _transfer_type,
+    "account_type_and_amount": _account_type_and_amount,
+}
+
+DEFAULT_MIX = "clean=0.4,account_number=0.15,account_type=0.15,transfer_amount=0.1,transfer_type=0.1,account_type_and_amount=0.1"
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+def _pick(rng, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def _first_unused_synthetic_number(connection) -> int:
+    # Continue above every synthetic reference already issued, including
+    # those numbered after their transfer's id by earlier versions
+    highest = connection.execute(
+        select(func.max(cast(func.substr(Transfer.reference_number, 9), Integer)))
+        .where(Transfer.reference_number.like("TRF-SYN-%"))
+    ).scalar()
+    return (highest or 0) + 1
+
+
+def _insert_returning_ids(connection, model, rows) -> list:
+    """Insert ``rows`` and return the ids the database gave them, in row order"""
+    if not rows:
+        return []
+    result = connection.execute(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return result.scalars().all()
+
+
+def generate(
+    transfers: int,
+    mix: dict,
+    ticket_ratio: float,
+    escalation_ratio: float,
+    days: int,
+    batch_size: int,
+    seed: int = None,
+):
+    rng = random.Random(seed)
+    init_schema()
+    seed_database()
+
+    db = SessionLocal()
+    user_ids = [user_id for (user_id,) in db.query(User.id)]
+    db.close()
+
+    # Block leases sized to a batch, so identifiers come from the same
+    # sequences the API uses and never collide with tickets it creates
+    ticket_numbers = BlockSequence("zendesk_ticket_number", batch_size, _first_unused_ticket_number)
+    ticket_keys = BlockSequence("jira_ticket_key", batch_size, _first_unused_key_number)
+    # Numbers the synthetic reference and form numbers, shared by a transfer and its form
+    synthetic_numbers = BlockSequence("synthetic_transfer_number", batch_size, _first_unused_synthetic_number)
+
+    # created_at rises with id across the window, like organically grown data
+    window_start = datetime.now() - timedelta(days=days)
+    step = timedelta(days=days) / max(transfers, 1)
+    scenario_counts = dict.fromkeys(mix, 0)
+    counts = {"transfers": 0, "t2220_forms": 0, "zendesk_tickets": 0, "jira_tickets": 0}
+    started = time.perf_counter()
+
+    for batch_start in range(0, transfers, batch_size):
+        transfer_rows, form_rows, ticket_rows, jira_rows = [], [], [], []
+        # Ids are only known once inserted, so links are kept as positions in this batch
+        ticket_transfers, jira_links = [], []
+
+        for index in range(batch_start, min(batch_start + batch_size, transfers)):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            name = f"{first} {last}"
+            number = synthetic_numbers.next_value()
+            email = f"{first[0].lower()}.{last.lower()}{number}@email.com"
+            created_at = window_start + step * index
+            transfer = {
+                "reference_number": f"TRF-SYN-{number:09d}",
+                "customer_name": name,
+                "customer_email": email,
+                "from_institution": rng.choice(INSTITUTIONS),
+                "to_institution": "Wealthsimple",
+                "account_number": f"{rng.randrange(10 ** 9, 10 ** 10)}",
+                "account_type": rng.choice(ACCOUNT_TYPES),
+                "transfer_type": rng.choice(["full", "partial"]),
+                "transfer_amount": Decimal(rng.randrange(100000, 15000000)) / 100,
+                "status": _pick(rng, TRANSFER_STATUSES),
+                "initiated_date": created_at,
+                "expected_completion": created_at + timedelta(days=10),
+                "issues": [],
+                "notes": "",
+                "created_at": created_at,
+            }
+            transfer_rows.append(transfer)
+
+            scenario = _pick(rng, mix)
+            scenario_counts[scenario] += 1
+            form = {
+                "form_number": f"T2220-SYN-{number:09d}",
+                "account_holder_name": name,
+                "account_number_on_form": transfer["account_number"],
+                "account_type_on_form": transfer["account_type"],
+                "transfer_amount_on_form": transfer["transfer_amount"],
+                "transfer_type_on_form": transfer["transfer_type"],
+                "signature_date": created_at - timedelta(days=2),
+                "form_pdf_url": f"/forms/T2220-SYN-{number:09d}.pdf",
+                "verified": False,
+                "created_at": created_at,
+            }
+            form.update(SCENARIOS[scenario](rng, transfer))
+            form_rows.append(form)
+
+            if rng.random() < ticket_ratio:
+                ticket = {
+                    "ticket_number": f"ZEN-{ticket_numbers.next_value():06d}",
+                    "customer_name": name,
+                    "customer_email": email,
+                    "subject": f"{transfer['account_type']} Transfer from {transfer['from_institution']} - Status?",
+                    "description": (
+                        f"Hi, I'm checking on my {transfer['account_type']} transfer from "
+                        f"{transfer['from_institution']}. Reference: {transfer['reference_number']}"
+                    ),
+                    "status": _pick(rng, TICKET_STATUSES),
+                    "priority": _pick(rng, TICKET_PRIORITIES),
+                    "transfer_reference": transfer["reference_number"],
+                    "assigned_agent_id": rng.choice(user_ids) if user_ids and rng.random() < 0.6 else None,
+                    "created_at": created_at + timedelta(hours=1),
+                }
+                ticket_rows.append(ticket)
+                ticket_transfers.append(len(transfer_rows) - 1)
+
+                if rng.random() < escalation_ratio:
+                    jira_rows.append({
+                        "ticket_key": f"XFER-{ticket_keys.next_value()}",
+                        "summary": f"Transfer delayed: {transfer['reference_number']}",
+                        "description": f"Customer {name} escalated from {ticket['ticket_number']}",
+                        "priority": _pick(rng, JIRA_PRIORITIES),
+                        "status": _pick(rng, JIRA_STATUSES),
+                        "created_by_id": rng.choice(user_ids) if user_ids else None,
+                        "created_at": created_at + timedelta(hours=2),
+                    })
+                    jira_links.append((len(ticket_rows) - 1, len(transfer_rows) - 1))
+
+        with engine.begin() as connection:
+            transfer_ids = _insert_returning_ids(connection, Transfer, transfer_rows)
+            for form, transfer_id in zip(form_rows, transfer_ids):
+                form["transfer_id"] = transfer_id
+            connection.execute(insert(T2220Form), form_rows)
+            for ticket, position in zip(ticket_rows, ticket_transfers):
+                ticket["transfer_id"] = transfer_ids[position]
+            ticket_ids = _insert_returning_ids(connection, ZendeskTicket, ticket_rows)
+            for row, (ticket_position, transfer_position) in zip(jira_rows, jira_links):
+                row["zendesk_ticket_id"] = ticket_ids[ticket_position]
+                row["transfer_id"] = transfer_ids[transfer_position]
+            if jira_rows:
+                connection.execute(insert(JiraTicket), jira_rows)
+            # Bulk inserts bypass the ORM flush hooks, so refresh mismatches and counters here
+            refresh_mismatches(connection, transfer_ids)
+            for model, rows in (
+                (Transfer, transfer_rows), (T2220Form, form_rows), (ZendeskTicket, ticket_rows), (JiraTicket, jira_rows)
+            ):
+                add_rows(connection, model, rows)
+
+        counts["transfers"] += len(transfer_rows)
+        counts["t2220_forms"] += len(form_rows)
+        counts["zendesk_tickets"] += len(ticket_rows)
+        counts["jira_tickets"] += len(jira_rows)
+        elapsed = time.perf_counter() - started
+        print(f"{counts['transfers']}/{transfers} transfers ({counts['transfers'] / elapsed:.0f}/s)")
+
+    print("Created " + ", ".join(f"{count} {name}" for name, count in counts.items()))
+    print("Scenario mix: " + ", ".join(f"{name}={count}" for name, count in scenario_counts.items()))
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transfers", type=int, default=100000)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--ticket-ratio", type=float, default=0.5, help="share of transfers with a Zendesk ticket")
+    parser.add_argument("--escalation-ratio", type=float, default=0.2, help="share of tickets escalated to JIRA")
+    parser.add_argument("--days", type=int, default=180, help="spread created_at over this many past days")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=None, help="random seed, for reproducible datasets")
+    args = parser.parse_args()
+    generate(
+        transfers=args.transfers,
+        mix=args.mix,
+        ticket_ratio=args.ticket_ratio,
+        escalation_ratio=args.escalation_ratio,
+        days=args.days,
+        batch_size=args.batch_size,
+        seed=args.seed,
+    )
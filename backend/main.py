@@ -1,12 +1,25 @@
+import asyncio
+import time
+
+# Imports below are timed for the startup report
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 
-from database import engine, Base
-from routers import auth_router, zendesk_router, atlas_router, t2220_router, jira_router, users_router
+from conditional import ETAG_HEADER
+from counters import COUNTER_RECONCILE_SECONDS, reconcile_periodically
+from metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, render_metrics
+from pagination import NEXT_CURSOR_HEADER
+from query_debug import DEBUG_HEADERS, QUERY_DEBUG_ENABLED, QueryDebugMiddleware
+from routers import (
+    auth_router, zendesk_router, atlas_router, t2220_router, jira_router, users_router, system_router, events_router,
+    dashboard_router,
+)
 from startup import run_startup
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+_import_seconds = time.perf_counter() - _import_started
 
 app = FastAPI(
     title="Transfer Status Workflow System",
@@ -21,7 +34,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, ETAG_HEADER, *DEBUG_HEADERS],
 )
+if QUERY_DEBUG_ENABLED:
+    app.add_middleware(QueryDebugMiddleware)
+# Added last so it wraps CORS too and times the whole request
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth_router)
@@ -30,11 +48,17 @@ app.include_router(zendesk_router)
 app.include_router(atlas_router)
 app.include_router(t2220_router)
 app.include_router(jira_router)
+app.include_router(system_router)
+app.include_router(events_router)
+app.include_router(dashboard_router)
 
 
 @app.on_event("startup")
 async def startup_event():
-    run_startup()
+    run_startup(import_seconds=_import_seconds)
+    if COUNTER_RECONCILE_SECONDS > 0:
+        # Kept on app.state so the task is not garbage collected
+        app.state.counter_reconciler = asyncio.create_task(reconcile_periodically(COUNTER_RECONCILE_SECONDS))
 
 
 @app.get("/")
@@ -47,6 +71,11 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8002)
@@ -0,0 +1,257 @@
+"""Request metrics in Prometheus text format.
+
+MetricsMiddleware times every HTTP request and labels it by route
+template (``/atlas/transfers/{transfer_id}``), which FastAPI leaves in
+``scope["route"]`` once routing is done. Time spent in the database is
+collected from engine cursor events into a per-request RequestStats held
+in a context variable. Everything lives in plain dicts updated on the
+event loop, so recording costs a few additions per request.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from auth import password_pool, user_cache
+from transfer_cache import transfer_cache
+from database import async_engine, engine, pool_telemetry
+from events import broker
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Requests that match no route share one label, so stray paths cannot
+# blow up the number of series
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    """Database work done while serving one request"""
+
+    __slots__ = ("db_seconds", "statements", "statement_counts")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.statements = 0
+        # SQL text -> executions, for spotting the same query run in a loop
+        self.statement_counts = {}
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _request_stats.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _request_stats.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is not None and started is not None:
+        stats.db_seconds += time.perf_counter() - started
+        stats.statements += 1
+        stats.statement_counts[statement] = stats.statement_counts.get(statement, 0) + 1
+
+
+for _engine in (engine, async_engine.sync_engine):
+    event.listen(_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class _Histogram:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.in_flight = 0
+        self.latency = {}       # (method, route) -> _Histogram
+        self.db_latency = {}    # (method, route) -> _Histogram
+        self.statements = {}    # (method, route) -> int
+        self.responses = {}     # (method, route, status) -> int
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route)
+        latency = self.latency.get(key)
+        if latency is None:
+            latency = self.latency[key] = _Histogram()
+            self.db_latency[key] = _Histogram()
+            self.statements[key] = 0
+        latency.observe(seconds)
+        self.db_latency[key].observe(stats.db_seconds)
+        self.statements[key] += stats.statements
+        self.count_response(method, route, status)
+
+    def count_response(self, method: str, route: str, status: int):
+        status_key = (method, route, status)
+        self.responses[status_key] = self.responses.get(status_key, 0) + 1
+
+
+request_metrics = RequestMetrics()
+
+
+def _is_event_stream(message) -> bool:
+    for name, value in message.get("headers", ()):
+        if name.lower() == b"content-type":
+            return value.startswith(b"text/event-stream")
+    return False
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware; BaseHTTPMiddleware would add a task per request.
+
+    Server-Sent Events streams stay open for as long as the client
+    listens, so once a response turns out to be one it leaves the
+    in-flight gauge and is kept out of the latency histograms; open streams
+    are reported by events_subscribers instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        streaming = False
+
+        async def send_with_status(message):
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if _is_event_stream(message):
+                    streaming = True
+                    request_metrics.in_flight -= 1
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        request_metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_stats.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            if streaming:
+                request_metrics.count_response(scope["method"], path, status)
+            else:
+                request_metrics.in_flight -= 1
+                request_metrics.observe(scope["method"], path, status, elapsed, stats)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram_lines(name: str, help_text: str, histograms: dict) -> list:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), histogram.buckets):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(method=method, route=route, le=bound)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route)} {histogram.sum}")
+        lines.append(f"{name}_count{_labels(method=method, route=route)} {histogram.count}")
+    return lines
+
+
+def _metric_lines(name: str, kind: str, help_text: str, samples) -> list:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(**labels) if labels else ''} {value}")
+    return lines
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    metrics = request_metrics
+    lines = []
+    lines += _histogram_lines(
+        "http_request_duration_seconds", "Request latency by route template", metrics.latency,
+    )
+    lines += _metric_lines(
+        "http_requests_total", "counter", "Responses by route template and status code",
+        (({"method": method, "route": route, "status": status}, count)
+         for (method, route, status), count in sorted(metrics.responses.items())),
+    )
+    lines += _metric_lines(
+        "http_requests_in_flight", "gauge", "Requests currently being served",
+        [({}, metrics.in_flight)],
+    )
+    lines += _histogram_lines(
+        "http_request_db_duration_seconds", "Time spent in database calls per request", metrics.db_latency,
+    )
+    lines += _metric_lines(
+        "http_request_db_statements_total", "counter", "SQL statements executed while serving requests",
+        (({"method": method, "route": route}, count) for (method, route), count in sorted(metrics.statements.items())),
+    )
+
+    pool = pool_telemetry.stats()
+    lines += _metric_lines("db_pool_checked_out", "gauge", "Connections currently checked out", [({}, pool["checked_out"])])
+    lines += _metric_lines("db_pool_connects_total", "counter", "New database connections opened", [({}, pool["connects"])])
+    lines += _metric_lines("db_pool_checkouts_total", "counter", "Connections checked out of the pool", [({}, pool["checkouts"])])
+    lines += _metric_lines(
+        "db_pool_acquire_seconds_max", "gauge", "Longest wait for a pooled connection", [({}, pool["acquire_seconds_max"])],
+    )
+
+    caches = {"users": user_cache.stats(), "transfers": transfer_cache.stats()}
+    lines += _metric_lines(
+        "cache_hits_total", "counter", "Cache lookups that found an entry",
+        (({"cache": name}, stats["hits"]) for name, stats in caches.items()),
+    )
+    lines += _metric_lines(
+        "cache_misses_total", "counter", "Cache lookups that missed",
+        (({"cache": name}, stats["misses"]) for name, stats in caches.items()),
+    )
+    lines += _metric_lines(
+        "cache_hit_ratio", "gauge", "Share of cache lookups that found an entry since start",
+        (({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()),
+    )
+    lines += _metric_lines(
+        "cache_entries", "gauge", "Entries currently cached",
+        (({"cache": name}, stats["size"]) for name, stats in caches.items()),
+    )
+
+    events = broker.stats()
+    lines += _metric_lines("events_subscribers", "gauge", "Open Server-Sent Events streams", [({}, events["subscribers"])])
+    lines += _metric_lines("events_published_total", "counter", "Change events published", [({}, events["published"])])
+
+    passwords = password_pool.stats()
+    lines += _metric_lines(
+        "password_pool_in_flight", "gauge", "Password hashes being computed", [({}, passwords["in_flight"])],
+    )
+    lines += _metric_lines(
+        "password_pool_queue_depth", "gauge", "Password hashes waiting for a worker", [({}, passwords["queue_depth"])],
+    )
+    lines += _metric_lines(
+        "password_pool_rejected_total", "counter", "Logins turned away because the pool was full",
+        [({}, passwords["rejected"])],
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,169 @@
+from sqlalchemy import delete, event, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models.transfer import Transfer
+from models.t2220_form import T2220Form
+from models.transfer_mismatch import TransferMismatch
+
+# (transfer attribute, T2220 form attribute) pairs that must agree
+COMPARED_FIELDS = (
+    ("account_number", "account_number_on_form"),
+    ("account_type", "account_type_on_form"),
+    ("transfer_amount", "transfer_amount_on_form"),
+    ("transfer_type", "transfer_type_on_form"),
+)
+
+
+def find_mismatches(transfer, form) -> list:
+    """List the fields where ``transfer`` and ``form`` disagree.
+
+    Both arguments only need attribute access, so ORM instances and
+    result-row bundles work alike.
+    """
+    mismatches = []
+    for field, form_field in COMPARED_FIELDS:
+        atlas_value = getattr(transfer, field)
+        form_value = getattr(form, form_field)
+        if field == "transfer_amount":
+            # Amounts are only compared when both sides are filled in
+            if not (atlas_value and form_value):
+                continue
+            atlas_value, form_value = float(atlas_value), float(form_value)
+        if atlas_value != form_value:
+            mismatches.append({
+                "field": field,
+                "atlas_value": atlas_value,
+                "form_value": form_value,
+            })
+    return mismatches
+
+
+def build_comparison(transfer, form) -> dict:
+    """Transfer data alongside its T2220 form (or None) and their mismatches"""
+    comparison = {
+        "transfer": {
+            "id": transfer.id,
+            "reference_number": transfer.reference_number,
+            "customer_name": transfer.customer_name,
+            "account_number": transfer.account_number,
+            "account_type": transfer.account_type,
+            "transfer_amount": float(transfer.transfer_amount) if transfer.transfer_amount else None,
+            "transfer_type": transfer.transfer_type,
+            "from_institution": transfer.from_institution,
+            "to_institution": transfer.to_institution,
+            "status": transfer.status,
+        },
+        "t2220_form": None,
+        "mismatches": []
+    }
+
+    if form is not None:
+        comparison["t2220_form"] = {
+            "id": form.id,
+            "form_number": form.form_number,
+            "account_holder_name": form.account_holder_name,
+            "account_number_on_form": form.account_number_on_form,
+            "account_type_on_form": form.account_type_on_form,
+            "transfer_amount_on_form": float(form.transfer_amount_on_form) if form.transfer_amount_on_form else None,
+            "transfer_type_on_form": form.transfer_type_on_form,
+            "verified": form.verified,
+        }
+        comparison["mismatches"] = find_mismatches(transfer, form)
+
+    return comparison
+
+
+# Transfer ids per refresh statement, to keep IN lists bounded
+REFRESH_CHUNK_SIZE = 500
+
+
+def refresh_mismatches(connection, transfer_ids):
+    """Recompute the stored mismatches for the given transfers"""
+    transfer_ids = list(transfer_ids)
+    for start in range(0, len(transfer_ids), REFRESH_CHUNK_SIZE):
+        chunk = transfer_ids[start:start + REFRESH_CHUNK_SIZE]
+        connection.execute(delete(TransferMismatch).where(TransferMismatch.transfer_id.in_(chunk)))
+
+        rows = connection.execute(
+            select(
+                Transfer.id.label("transfer_id"),
+                T2220Form.id.label("form_id"),
+                *(getattr(Transfer, field) for field, _ in COMPARED_FIELDS),
+                *(getattr(T2220Form, form_field) for _, form_field in COMPARED_FIELDS),
+            )
+            .join(T2220Form, T2220Form.transfer_id == Transfer.id)
+            .where(Transfer.id.in_(chunk))
+            .order_by(Transfer.id, T2220Form.id)
+        )
+
+        records = []
+        seen = set()
+        for row in rows:
+            # Same rule as the comparison routes: the first form wins
+            if row.transfer_id in seen:
+                continue
+            seen.add(row.transfer_id)
+            for mismatch in find_mismatches(row, row):
+                records.append({
+                    "transfer_id": row.transfer_id,
+                    "t2220_form_id": row.form_id,
+                    "field": mismatch["field"],
+                    "atlas_value": _as_text(mismatch["atlas_value"]),
+                    "form_value": _as_text(mismatch["form_value"]),
+                })
+        if records:
+            connection.execute(insert(TransferMismatch), records)
+
+
+def _as_text(value):
+    return None if value is None else str(value)
+
+
+def _has_changes(obj, fields) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[field].history.has_changes() for field in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_after_flush(session, flush_context):
+    """Keep transfer_mismatches in step with every ORM write to transfers or forms"""
+    transfer_fields = [field for field, _ in COMPARED_FIELDS]
+    form_fields = [form_field for _, form_field in COMPARED_FIELDS] + ["transfer_id"]
+
+    transfer_ids = set()
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Transfer):
+            transfer_ids.add(obj.id)
+        elif isinstance(obj, T2220Form):
+            transfer_ids.add(obj.transfer_id)
+    for obj in session.dirty:
+        if isinstance(obj, Transfer) and _has_changes(obj, transfer_fields):
+            transfer_ids.add(obj.id)
+        elif isinstance(obj, T2220Form) and _has_changes(obj, form_fields):
+            transfer_ids.add(obj.transfer_id)
+            transfer_ids.update(inspect(obj).attrs.transfer_id.history.deleted or ())
+
+    transfer_ids.discard(None)
+    if transfer_ids:
+        refresh_mismatches(session.connection(), transfer_ids)
+
+
+def rebuild_mismatches():
+    """Recompute every stored mismatch, e.g. after a load that bypassed the ORM"""
+    db = SessionLocal()
+    try:
+        connection = db.connection()
+        connection.execute(delete(TransferMismatch))
+        transfer_ids = connection.execute(
+            select(T2220Form.transfer_id).distinct().where(T2220Form.transfer_id.is_not(None))
+        ).scalars().all()
+        refresh_mismatches(connection, transfer_ids)
+        db.commit()
+        print(f"Rebuilt mismatches for {len(transfer_ids)} transfers")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    rebuild_mismatches()
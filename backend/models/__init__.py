@@ -3,5 +3,12 @@ from models.zendesk_ticket import ZendeskTicket
 from models.transfer import Transfer
 from models.t2220_form import T2220Form
 from models.jira_ticket import JiraTicket
+from models.transfer_mismatch import TransferMismatch
+from models.key_sequence import KeySequence
+from models.schema_version import SchemaVersion
+from models.dashboard_counter import DashboardCounter
 
-__all__ = ["User", "ZendeskTicket", "Transfer", "T2220Form", "JiraTicket"]
+__all__ = [
+    "User", "ZendeskTicket", "Transfer", "T2220Form", "JiraTicket", "TransferMismatch", "KeySequence", "SchemaVersion",
+    "DashboardCounter",
+]
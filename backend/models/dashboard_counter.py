@@ -0,0 +1,10 @@
+from sqlalchemy import Column, Integer, String
+from database import Base
+
+
+class DashboardCounter(Base):
+    __tablename__ = "dashboard_counters"
+
+    metric = Column(String, primary_key=True)  # e.g., "transfers.status"
+    bucket = Column(String, primary_key=True)  # Column value being counted, e.g., "pending"
+    value = Column(Integer, nullable=False, default=0)
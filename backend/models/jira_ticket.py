@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from database import Base
+from database import Base, precise_now
 
 
 class JiraTicket(Base):
     __tablename__ = "jira_tickets"
+    __table_args__ = (
+        # Escalation queue filters on status and pages by (created_at, id)
+        Index("ix_jira_tickets_created_at_id", "created_at", "id"),
+        Index("ix_jira_tickets_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     ticket_key = Column(String, unique=True, index=True)  # e.g., "XFER-1234"
@@ -31,4 +37,8 @@ class JiraTicket(Base):
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=precise_now())
+
+    transfer = relationship("Transfer", back_populates="jira_tickets", lazy="raise")
+    zendesk_ticket = relationship("ZendeskTicket", back_populates="jira_tickets", lazy="raise")
+    created_by = relationship("User", lazy="raise")
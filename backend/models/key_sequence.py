@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from database import Base
+
+
+class KeySequence(Base):
+    __tablename__ = "key_sequences"
+
+    name = Column(String, primary_key=True)  # e.g., "jira_ticket_key"
+    next_value = Column(Integer, nullable=False)  # First value not yet leased to any process
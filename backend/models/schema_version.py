@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    id = Column(Integer, primary_key=True)
+    fingerprint = Column(String, nullable=False)  # Hash of the tables, columns and indexes last applied
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
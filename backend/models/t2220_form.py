@@ -1,11 +1,16 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from database import Base
+from database import Base, precise_now
 
 
 class T2220Form(Base):
     __tablename__ = "t2220_forms"
+    __table_args__ = (
+        # Verification queue filters on verified and pages by (created_at, id)
+        Index("ix_t2220_forms_created_at_id", "created_at", "id"),
+        Index("ix_t2220_forms_verified_created_at_id", "verified", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     form_number = Column(String, unique=True, index=True)  # e.g., "T2220-2024-001234"
@@ -30,4 +35,7 @@ class T2220Form(Base):
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=precise_now())
+
+    transfer = relationship("Transfer", back_populates="t2220_form", lazy="raise")
+    verified_by = relationship("User", lazy="raise")
@@ -1,10 +1,16 @@
-from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, Numeric, DateTime, Text, JSON, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from database import Base
+from database import Base, precise_now
 
 
 class Transfer(Base):
     __tablename__ = "transfers"
+    __table_args__ = (
+        # List views filter on status and page by (created_at, id)
+        Index("ix_transfers_created_at_id", "created_at", "id"),
+        Index("ix_transfers_status_created_at_id", "status", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reference_number = Column(String, unique=True, index=True)  # e.g., "TRF-2024-001234"
@@ -30,4 +36,12 @@ class Transfer(Base):
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=precise_now())
+
+    # Relationships are lazy="raise": async sessions cannot lazy load, so
+    # queries that need them say so with selectinload()/joinedload()
+    t2220_form = relationship("T2220Form", back_populates="transfer", uselist=False, lazy="raise")
+    zendesk_tickets = relationship(
+        "ZendeskTicket", back_populates="transfer", order_by="ZendeskTicket.created_at", lazy="raise"
+    )
+    jira_tickets = relationship("JiraTicket", back_populates="transfer", order_by="JiraTicket.created_at", lazy="raise")
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from database import Base
+
+
+class TransferMismatch(Base):
+    __tablename__ = "transfer_mismatches"
+    __table_args__ = (
+        # Review queues list one kind of mismatch at a time, newest first
+        Index("ix_transfer_mismatches_field_created_at_id", "field", "created_at", "id"),
+        Index("ix_transfer_mismatches_created_at_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    transfer_id = Column(Integer, ForeignKey("transfers.id"), index=True)
+    t2220_form_id = Column(Integer, ForeignKey("t2220_forms.id"))
+
+    # Which field disagrees, and the value on each side
+    field = Column(String)  # account_number, account_type, transfer_amount, transfer_type
+    atlas_value = Column(String, nullable=True)
+    form_value = Column(String, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
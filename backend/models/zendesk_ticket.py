@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from database import Base
+from database import Base, precise_now
 
 
 class ZendeskTicket(Base):
     __tablename__ = "zendesk_tickets"
+    __table_args__ = (
+        # Queue filters (status, priority, assignee) then page by (created_at, id)
+        Index("ix_zendesk_tickets_created_at_id", "created_at", "id"),
+        Index("ix_zendesk_tickets_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_zendesk_tickets_priority_created_at_id", "priority", "created_at", "id"),
+        Index("ix_zendesk_tickets_assigned_agent_id_created_at_id", "assigned_agent_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     ticket_number = Column(String, unique=True, index=True)  # e.g., "ZEN-123456"
@@ -33,4 +41,8 @@ class ZendeskTicket(Base):
 
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=precise_now())
+
+    transfer = relationship("Transfer", back_populates="zendesk_tickets", lazy="raise")
+    assigned_agent = relationship("User", lazy="raise")
+    jira_tickets = relationship("JiraTicket", back_populates="zendesk_ticket", lazy="raise")
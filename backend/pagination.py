@@ -0,0 +1,121 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import String, and_, literal, or_, type_coerce
+
+from conditional import (
+    ETAG_HEADER, VERSION_LABEL, collection_etag, etag_matches, is_conditional, not_modified, row_version
+)
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Label of the raw created_at text selected for the cursor on SQLite
+CURSOR_LABEL = "cursor_created_at"
+
+
+def encode_cursor(created_at, row_id: int) -> str:
+    """Cursor for the row after which the next page starts.
+
+    ``created_at`` is a datetime, or on SQLite the exact text the row
+    holds, which the next page's bound must reproduce byte for byte.
+    """
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat(sep=" ")
+    payload = json.dumps([created_at, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """``(created_at text, id)`` from a cursor; the text is checked to be a timestamp"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        datetime.fromisoformat(created_at)
+        return created_at, int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _is_sqlite(db) -> bool:
+    return db.bind.dialect.name == "sqlite"
+
+
+def _created_at_bound(db, created_at: str):
+    # SQLite keeps timestamps as text and compares them as text: rows from
+    # the CURRENT_TIMESTAMP default have no fraction, rows written by the
+    # ORM have six digits of it. Only the row's own stored text orders the
+    # same way as ORDER BY, so the cursor carries it verbatim.
+    if _is_sqlite(db):
+        return literal(created_at, String)
+    return datetime.fromisoformat(created_at)
+
+
+async def paginate(
+    db,
+    query,
+    model,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    response: Response,
+    request: Optional[Request] = None,
+):
+    """Order the select by (created_at, id) descending and fetch one page.
+
+    Selecting the model returns ORM objects; selecting columns returns
+    rows, which must include created_at and id.
+
+    With a cursor the page starts right after the row it encodes, so every
+    page costs the same regardless of depth. ``skip`` is only honoured when
+    no cursor is given, for older clients. When the page is full, the cursor
+    for the next one is returned in the ``X-Next-Cursor`` header.
+
+    Given the request, each row's version is selected with the page to
+    build its ETag. A request carrying If-None-Match first reads the page
+    as (id, version) pairs only, and a matching one is answered with a 304
+    without running the full query.
+    """
+    query = query.order_by(model.created_at.desc(), model.id.desc())
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        bound = _created_at_bound(db, created_at)
+        query = query.where(
+            or_(
+                model.created_at < bound,
+                and_(model.created_at == bound, model.id < row_id),
+            )
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    query = query.limit(limit)
+    width = len(query.column_descriptions)
+    entities = width == 1
+    if request is not None:
+        if is_conditional(request):
+            versions = await db.execute(query.with_only_columns(model.id, row_version(model)))
+            etag = collection_etag(request, versions.all())
+            if etag_matches(request, etag):
+                raise not_modified(etag)
+        query = query.add_columns(row_version(model).label(VERSION_LABEL))
+    if _is_sqlite(db):
+        query = query.add_columns(type_coerce(model.created_at, String).label(CURSOR_LABEL))
+
+    # Frozen, so the rows can be read once with the extra columns and once without
+    result = (await db.execute(query)).freeze()
+    extended = result().all()
+    if request is not None:
+        response.headers[ETAG_HEADER] = collection_etag(request, [
+            ((row[0] if entities else row).id, row._mapping[VERSION_LABEL]) for row in extended
+        ])
+    selected = result().columns(*range(width)) if width < len(query.column_descriptions) else result()
+    rows = selected.scalars().all() if entities else selected.all()
+
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        created_at = extended[-1]._mapping[CURSOR_LABEL] if _is_sqlite(db) else last.created_at
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(created_at, last.id)
+    return rows
@@ -0,0 +1,80 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long each checkout took to its PoolTelemetry.
+
+    The pool has no event that fires before a checkout starts, so the wait
+    (queueing for a free connection, or opening a new one) is timed here,
+    whenever a session first needs its connection.
+    """
+    telemetry = None
+
+    def connect(self):
+        started = time.perf_counter()
+        connection = super().connect()
+        if self.telemetry is not None:
+            self.telemetry.record_acquire(time.perf_counter() - started)
+        return connection
+
+
+class PoolTelemetry:
+    """Live checkout counts and connection-acquire times for one engine's pool"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        if isinstance(pool, TimedAsyncAdaptedQueuePool):
+            pool.telemetry = self
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.acquires = 0
+        self.acquire_seconds_total = 0.0
+        self.acquire_seconds_max = 0.0
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+        event.listen(pool, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        self.checked_out += 1
+        self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.checked_out -= 1
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def record_acquire(self, seconds: float):
+        """Time a checkout spent waiting for (or opening) its connection"""
+        self.acquires += 1
+        self.acquire_seconds_total += seconds
+        self.acquire_seconds_max = max(self.acquire_seconds_max, seconds)
+
+    def stats(self) -> dict:
+        # size() and overflow() only exist on queue-style pools
+        size = getattr(self.pool, "size", None)
+        overflow = getattr(self.pool, "overflow", None)
+        return {
+            "pool_class": type(self.pool).__name__,
+            "size": size() if size else None,
+            "overflow": overflow() if overflow else None,
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "invalidations": self.invalidations,
+            "acquires": self.acquires,
+            "acquire_seconds_avg": self.acquire_seconds_total / self.acquires if self.acquires else 0.0,
+            "acquire_seconds_max": self.acquire_seconds_max,
+        }
@@ -0,0 +1,132 @@
+"""SQL statement counts per request, N+1 warnings and query budgets.
+
+Builds on the per-request RequestStats collected in metrics.py. Off by
+default; enable with:
+
+    QUERY_DEBUG_HEADERS=true     add X-DB-Statements / X-DB-Time-Ms /
+                                 X-DB-Repeated-Statement to every response
+    QUERY_BUDGET_MODE=record     remember the most statements each route
+                                 has needed, in QUERY_BUDGET_FILE
+    QUERY_BUDGET_MODE=enforce    answer 500 when a route runs more
+                                 statements than its recorded budget
+
+Either setting also prints a warning when one statement runs
+N_PLUS_ONE_THRESHOLD times or more within a request.
+"""
+import json
+import os
+import threading
+from typing import Optional
+
+from starlette.datastructures import MutableHeaders
+
+from metrics import current_request_stats
+
+QUERY_DEBUG_HEADERS = os.getenv("QUERY_DEBUG_HEADERS", "false").lower() == "true"
+QUERY_BUDGET_MODE = os.getenv("QUERY_BUDGET_MODE", "off").lower()  # off, record, enforce
+QUERY_BUDGET_FILE = os.getenv(
+    "QUERY_BUDGET_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "query_budgets.json"),
+)
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+
+QUERY_DEBUG_ENABLED = QUERY_DEBUG_HEADERS or QUERY_BUDGET_MODE in ("record", "enforce")
+
+STATEMENTS_HEADER = "X-DB-Statements"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+REPEATED_HEADER = "X-DB-Repeated-Statement"
+BUDGET_HEADER = "X-Query-Budget"
+DEBUG_HEADERS = [STATEMENTS_HEADER, DB_TIME_HEADER, REPEATED_HEADER, BUDGET_HEADER]
+
+
+class QueryBudgets:
+    """Statement budgets per "METHOD /route/{template}", kept in a JSON file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.budgets = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.budgets = json.load(f)
+
+    def get(self, key: str) -> Optional[int]:
+        return self.budgets.get(key)
+
+    def record(self, key: str, statements: int):
+        if statements <= self.budgets.get(key, -1):
+            return
+        with self._lock:
+            self.budgets[key] = statements
+            with open(self.path, "w") as f:
+                json.dump(dict(sorted(self.budgets.items())), f, indent=2)
+                f.write("\n")
+
+
+query_budgets = QueryBudgets(QUERY_BUDGET_FILE) if QUERY_BUDGET_MODE in ("record", "enforce") else None
+
+
+class QueryDebugMiddleware:
+    """Checks statement counts when the response starts; must sit inside MetricsMiddleware"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        replaced = False
+
+        async def send_checked(message):
+            nonlocal replaced
+            if replaced:
+                # The route's own response was swapped for the budget error
+                return
+            if message["type"] != "http.response.start":
+                await send(message)
+                return
+
+            stats = current_request_stats()
+            route = scope.get("route")
+            key = f"{scope['method']} {route.path}" if route is not None else None
+            repeated = max(stats.statement_counts.values(), default=0)
+            if repeated >= N_PLUS_ONE_THRESHOLD:
+                statement = max(stats.statement_counts, key=stats.statement_counts.get)
+                print(f"Possible N+1 in {key or scope['path']}: ran {repeated} times: {' '.join(statement.split())[:200]}")
+
+            budget = None
+            if key and query_budgets is not None:
+                if QUERY_BUDGET_MODE == "record":
+                    query_budgets.record(key, stats.statements)
+                budget = query_budgets.get(key)
+
+            if QUERY_BUDGET_MODE == "enforce" and budget is not None and stats.statements > budget:
+                replaced = True
+                body = json.dumps({
+                    "detail": f"Query budget exceeded: {key} ran {stats.statements} statements, budget is {budget}",
+                }).encode()
+                message = {
+                    "type": "http.response.start",
+                    "status": 500,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+                }
+                self._add_headers(message, stats, repeated, budget)
+                await send(message)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            if QUERY_DEBUG_HEADERS:
+                self._add_headers(message, stats, repeated, budget)
+            await send(message)
+
+        await self.app(scope, receive, send_checked)
+
+    @staticmethod
+    def _add_headers(message, stats, repeated: int, budget: Optional[int]):
+        headers = MutableHeaders(scope=message)
+        headers[STATEMENTS_HEADER] = str(stats.statements)
+        headers[DB_TIME_HEADER] = f"{stats.db_seconds * 1000:.2f}"
+        headers[REPEATED_HEADER] = str(repeated)
+        if budget is not None:
+            headers[BUDGET_HEADER] = str(budget)
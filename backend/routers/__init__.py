@@ -4,6 +4,9 @@ from routers.atlas import router as atlas_router
 from routers.t2220 import router as t2220_router
 from routers.jira import router as jira_router
 from routers.users import router as users_router
+from routers.system import router as system_router
+from routers.events import router as events_router
+from routers.dashboard import router as dashboard_router
 
 __all__ = [
     "auth_router",
@@ -12,4 +15,7 @@ __all__ = [
     "t2220_router",
     "jira_router",
     "users_router",
+    "system_router",
+    "events_router",
+    "dashboard_router",
 ]
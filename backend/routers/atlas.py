@@ -1,66 +1,362 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Bundle, selectinload
+from typing import List, Optional
+from types import SimpleNamespace
+import csv
+import json
 
 from database import get_db
 from models.user import User
 from models.transfer import Transfer
 from models.t2220_form import T2220Form
-from schemas.transfer import TransferCreate, TransferUpdate, TransferResponse
+from models.transfer_mismatch import TransferMismatch
+from models.zendesk_ticket import ZendeskTicket
+from models.jira_ticket import JiraTicket
+from schemas.transfer import TransferCreate, TransferUpdate, TransferResponse, TransferBulkUpdate
+from schemas.bulk import BulkUpdateResponse
+from schemas.transfer_mismatch import TransferMismatchResponse
+from schemas.case import TransferCaseResponse
+from bulk import bulk_update, filter_conditions
+from counters import add_rows
+from mismatches import build_comparison
+from events import broker
 from auth import get_current_user
+from conditional import ETAG_HEADER, version_etag
+from pagination import paginate
+from serialization import FIELDS_QUERY, FastJSONResponse, lean_response, schema_columns, schema_fields
+from transfer_cache import transfer_cache
 
 router = APIRouter(prefix="/atlas", tags=["Atlas Transfers"])
 
+IMPORT_BATCH_SIZE = 1000
+IMPORT_MAX_REPORTED_ERRORS = 1000
+COMPARISON_MAX_BATCH = 500
+
+
+class _Record(Bundle):
+    """Bundle whose rows keep the plain column names, even where they clash with another bundle's"""
+
+    def create_row_processor(self, query, procs, labels):
+        keys = list(self.c.keys())
+
+        def proc(row):
+            return SimpleNamespace(**{key: column_proc(row) for key, column_proc in zip(keys, procs)})
+        return proc
+
 
 @router.get("/transfers", response_model=List[TransferResponse])
-def get_transfers(
+async def get_transfers(
+    response: Response,
+    request: Request,
     status: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    query = select(*schema_columns(Transfer, TransferResponse, fields))
+
+    if status:
+        query = query.where(Transfer.status == status)
+
+    rows = await paginate(db, query, Transfer, cursor, skip, limit, response, request)
+    return lean_response(rows, response)
+
+
+def _decode_line(line: bytes, line_number: int):
+    try:
+        text = line.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        return ValueError(f"invalid UTF-8: {exc}")
+    if line_number == 1:
+        # Spreadsheet exports often start with a byte order mark
+        text = text.removeprefix("\ufeff")
+    return text.rstrip("\r")
+
+
+async def _iter_lines(request: Request):
+    """Yield (line_number, text) for each non-blank line of the request body.
+
+    A line that is not valid UTF-8 is yielded as a ValueError instead, so
+    it is reported without losing the rest of the body.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            text = _decode_line(line, line_number)
+            if isinstance(text, Exception) or text.strip():
+                yield line_number, text
+    if buffer.strip():
+        yield line_number + 1, _decode_line(buffer, line_number + 1)
+
+
+async def _iter_ndjson_rows(request: Request):
+    async for line_number, text in _iter_lines(request):
+        if isinstance(text, Exception):
+            yield line_number, text
+            continue
+        try:
+            yield line_number, json.loads(text)
+        except ValueError as exc:
+            yield line_number, ValueError(f"invalid JSON: {exc}")
+
+
+async def _iter_csv_rows(request: Request):
+    # Rows are parsed line by line, so quoted fields cannot span lines
+    header = None
+    async for line_number, text in _iter_lines(request):
+        if isinstance(text, Exception):
+            yield line_number, text
+            if header is None:
+                # Without a header no later row can be read
+                return
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        # Empty cells fall back to the schema defaults
+        yield line_number, {name: value for name, value in zip(header, values) if value != ""}
+
+
+def _record_error(summary: dict, line_number: int, reference_number, error: str):
+    summary["failed"] += 1
+    if len(summary["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+        summary["errors"].append({
+            "line": line_number,
+            "reference_number": reference_number,
+            "error": error,
+        })
+
+
+def _describe_validation_error(err: dict) -> str:
+    # Row-level errors (a model validator, a row that is not an object) have an empty loc
+    loc = ".".join(str(part) for part in err["loc"])
+    return f"{loc}: {err['msg']}" if loc else err["msg"]
+
+
+async def _count_inserted(db: AsyncSession, rows: list):
+    # Core inserts skip the flush hook that keeps the dashboard counters
+    await db.run_sync(lambda session: add_rows(session.connection(), Transfer, rows))
+
+
+async def _insert_transfer_batch(db: AsyncSession, batch: list, summary: dict):
+    """Insert one batch with a single executemany, skipping rows that would collide"""
+    references = [row["reference_number"] for _, row in batch]
+    result = await db.execute(
+        select(Transfer.reference_number).where(Transfer.reference_number.in_(references))
+    )
+    existing = set(result.scalars())
+
+    rows = []
+    seen = set()
+    for line_number, row in batch:
+        reference = row["reference_number"]
+        if reference in existing or reference in seen:
+            _record_error(summary, line_number, reference, "reference_number already exists")
+            continue
+        seen.add(reference)
+        rows.append((line_number, row))
+
+    if not rows:
+        return
+    try:
+        await db.execute(insert(Transfer), [row for _, row in rows])
+        await _count_inserted(db, [row for _, row in rows])
+        await db.commit()
+        summary["inserted"] += len(rows)
+    except IntegrityError:
+        # A concurrent writer got in first; fall back to row-by-row to pinpoint it
+        await db.rollback()
+        for line_number, row in rows:
+            try:
+                await db.execute(insert(Transfer), [row])
+                await _count_inserted(db, [row])
+                await db.commit()
+                summary["inserted"] += 1
+            except IntegrityError as exc:
+                await db.rollback()
+                _record_error(summary, line_number, row["reference_number"], str(exc.orig))
+
+
+@router.post("/transfers/import")
+async def import_transfers(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Bulk-load transfers streamed as NDJSON or CSV.
+
+    Rows are validated as they arrive and inserted in batches of
+    IMPORT_BATCH_SIZE, each in its own transaction. Invalid or duplicate
+    rows are reported by line number without aborting the rest.
+    """
+    content_type = request.headers.get("content-type", "")
+    if "csv" in content_type:
+        rows = _iter_csv_rows(request)
+    elif "json" in content_type:
+        rows = _iter_ndjson_rows(request)
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Send application/x-ndjson or text/csv",
+        )
+
+    summary = {"inserted": 0, "failed": 0, "errors": []}
+    batch = []
+    async for line_number, raw in rows:
+        if isinstance(raw, Exception):
+            _record_error(summary, line_number, None, str(raw))
+            continue
+        try:
+            transfer = TransferCreate.model_validate(raw)
+        except ValidationError as exc:
+            reference = raw.get("reference_number") if isinstance(raw, dict) else None
+            message = "; ".join(_describe_validation_error(err) for err in exc.errors())
+            _record_error(summary, line_number, reference, message)
+            continue
+        batch.append((line_number, transfer.model_dump()))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _insert_transfer_batch(db, batch, summary)
+            batch = []
+
+    if batch:
+        await _insert_transfer_batch(db, batch, summary)
+    # Bulk inserts skip the ORM hooks that publish per-row events
+    if summary["inserted"]:
+        broker.publish("atlas", "transfer.imported", {"inserted": summary["inserted"]})
+    return summary
+
+
+@router.get("/comparisons")
+async def get_transfer_comparisons(
+    transfer_ids: List[int] = Query(None),
+    status: str = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(Transfer)
+    """Compare many transfers against their T2220 forms in one joined query.
 
+    Select transfers by id (repeat ``transfer_ids``) and/or by status;
+    results follow the transfer list order, newest first.
+    """
+    limit = min(limit, COMPARISON_MAX_BATCH)
+    page = select(Transfer.id)
+    if transfer_ids:
+        page = page.where(Transfer.id.in_(transfer_ids))
     if status:
-        query = query.filter(Transfer.status == status)
+        page = page.where(Transfer.status == status)
+    page = page.order_by(Transfer.created_at.desc(), Transfer.id.desc()).limit(limit).subquery()
+
+    transfer = _Record(
+        "transfer",
+        Transfer.id, Transfer.reference_number, Transfer.customer_name,
+        Transfer.account_number, Transfer.account_type, Transfer.transfer_amount,
+        Transfer.transfer_type, Transfer.from_institution, Transfer.to_institution,
+        Transfer.status,
+    )
+    form = _Record(
+        "form",
+        T2220Form.id, T2220Form.form_number, T2220Form.account_holder_name,
+        T2220Form.account_number_on_form, T2220Form.account_type_on_form,
+        T2220Form.transfer_amount_on_form, T2220Form.transfer_type_on_form,
+        T2220Form.verified,
+    )
+    rows = await db.execute(
+        select(transfer, form)
+        .join(page, page.c.id == Transfer.id)
+        .outerjoin(T2220Form, T2220Form.transfer_id == Transfer.id)
+        .order_by(Transfer.created_at.desc(), Transfer.id.desc(), T2220Form.id)
+    )
+
+    comparisons = []
+    seen = set()
+    for row in rows:
+        # A transfer with several forms is compared against the first one
+        if row.transfer.id in seen:
+            continue
+        seen.add(row.transfer.id)
+        comparisons.append(build_comparison(row.transfer, row.form if row.form.id is not None else None))
+    return comparisons
+
+
+@router.get("/mismatches", response_model=List[TransferMismatchResponse])
+async def get_mismatches(
+    response: Response,
+    request: Request,
+    field: str = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Stored Atlas/T2220 mismatches, optionally for one field (e.g. account_number)"""
+    query = select(*schema_columns(TransferMismatch, TransferMismatchResponse, fields))
+
+    if field:
+        query = query.where(TransferMismatch.field == field)
+
+    rows = await paginate(db, query, TransferMismatch, cursor, skip, limit, response, request)
+    return lean_response(rows, response)
+
 
-    transfers = query.order_by(Transfer.created_at.desc()).offset(skip).limit(limit).all()
-    return transfers
+def _cached_transfer_response(request: Request, entry: dict, fields: Optional[str]) -> FastJSONResponse:
+    transfer = entry["transfer"]
+    etag = version_etag(request, Transfer, transfer["id"], entry["version"], fields)
+    return FastJSONResponse(
+        {name: transfer[name] for name in schema_fields(TransferResponse, fields)}, headers={ETAG_HEADER: etag}
+    )
 
 
 @router.get("/transfers/{transfer_id}", response_model=TransferResponse)
-def get_transfer(
+async def get_transfer(
+    request: Request,
     transfer_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
-    if not transfer:
+    entry = await transfer_cache.get_by_id(db, transfer_id)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Transfer not found")
-    return transfer
+    return _cached_transfer_response(request, entry, fields)
 
 
 @router.get("/transfers/reference/{reference_number}", response_model=TransferResponse)
-def get_transfer_by_reference(
+async def get_transfer_by_reference(
+    request: Request,
     reference_number: str,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    transfer = db.query(Transfer).filter(Transfer.reference_number == reference_number).first()
-    if not transfer:
+    entry = await transfer_cache.get_by_reference(db, reference_number)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Transfer not found")
-    return transfer
+    return _cached_transfer_response(request, entry, fields)
 
 
 @router.put("/transfers/{transfer_id}", response_model=TransferResponse)
-def update_transfer(
+async def update_transfer(
     transfer_id: int,
     transfer_data: TransferUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
+    transfer = await db.get(Transfer, transfer_id)
     if not transfer:
         raise HTTPException(status_code=404, detail="Transfer not found")
 
@@ -68,79 +364,71 @@ def update_transfer(
     for field, value in update_data.items():
         setattr(transfer, field, value)
 
-    db.commit()
-    db.refresh(transfer)
+    await db.commit()
+    await transfer_cache.invalidate(transfer_id)
+    await db.refresh(transfer)
     return transfer
 
 
+@router.post("/transfers/bulk-update", response_model=BulkUpdateResponse)
+async def bulk_update_transfers(
+    bulk_data: TransferBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Set status and/or notes on many transfers, picked by ids and/or a filter, in one UPDATE"""
+    summary = await bulk_update(
+        db, Transfer, bulk_data.ids, filter_conditions(Transfer, bulk_data.filter),
+        bulk_data.model_dump(exclude_unset=True, include={"status", "notes"}),
+    )
+    await transfer_cache.invalidate(*(
+        result["id"] for result in summary["results"] if result["outcome"] == "updated"
+    ))
+    return summary
+
+
 @router.get("/transfers/{transfer_id}/comparison")
-def get_transfer_comparison(
+async def get_transfer_comparison(
     transfer_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get transfer data alongside T2220 form data for comparison"""
-    transfer = db.query(Transfer).filter(Transfer.id == transfer_id).first()
+    transfer = await db.get(Transfer, transfer_id)
     if not transfer:
         raise HTTPException(status_code=404, detail="Transfer not found")
 
-    t2220 = db.query(T2220Form).filter(T2220Form.transfer_id == transfer_id).first()
-
-    # Build comparison data
-    comparison = {
-        "transfer": {
-            "id": transfer.id,
-            "reference_number": transfer.reference_number,
-            "customer_name": transfer.customer_name,
-            "account_number": transfer.account_number,
-            "account_type": transfer.account_type,
-            "transfer_amount": float(transfer.transfer_amount) if transfer.transfer_amount else None,
-            "transfer_type": transfer.transfer_type,
-            "from_institution": transfer.from_institution,
-            "to_institution": transfer.to_institution,
-            "status": transfer.status,
-        },
-        "t2220_form": None,
-        "mismatches": []
-    }
-
-    if t2220:
-        comparison["t2220_form"] = {
-            "id": t2220.id,
-            "form_number": t2220.form_number,
-            "account_holder_name": t2220.account_holder_name,
-            "account_number_on_form": t2220.account_number_on_form,
-            "account_type_on_form": t2220.account_type_on_form,
-            "transfer_amount_on_form": float(t2220.transfer_amount_on_form) if t2220.transfer_amount_on_form else None,
-            "transfer_type_on_form": t2220.transfer_type_on_form,
-            "verified": t2220.verified,
-        }
-
-        # Detect mismatches
-        if transfer.account_number != t2220.account_number_on_form:
-            comparison["mismatches"].append({
-                "field": "account_number",
-                "atlas_value": transfer.account_number,
-                "form_value": t2220.account_number_on_form
-            })
-        if transfer.account_type != t2220.account_type_on_form:
-            comparison["mismatches"].append({
-                "field": "account_type",
-                "atlas_value": transfer.account_type,
-                "form_value": t2220.account_type_on_form
-            })
-        if transfer.transfer_amount and t2220.transfer_amount_on_form:
-            if float(transfer.transfer_amount) != float(t2220.transfer_amount_on_form):
-                comparison["mismatches"].append({
-                    "field": "transfer_amount",
-                    "atlas_value": float(transfer.transfer_amount),
-                    "form_value": float(t2220.transfer_amount_on_form)
-                })
-        if transfer.transfer_type != t2220.transfer_type_on_form:
-            comparison["mismatches"].append({
-                "field": "transfer_type",
-                "atlas_value": transfer.transfer_type,
-                "form_value": t2220.transfer_type_on_form
-            })
-
-    return comparison
+    result = await db.execute(select(T2220Form).where(T2220Form.transfer_id == transfer_id))
+    t2220 = result.scalars().first()
+    return build_comparison(transfer, t2220)
+
+
+@router.get("/transfers/{transfer_id}/case", response_model=TransferCaseResponse)
+async def get_transfer_case(
+    transfer_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Transfer with its T2220 form, Zendesk tickets, JIRA escalations and their users.
+
+    ``jira_tickets`` holds the escalations linked to the transfer itself;
+    each Zendesk ticket lists the escalations raised from it, including
+    those that were never linked to the transfer directly. Five queries
+    however many tickets there are: the transfer, then one selectin load
+    per relationship with its user joined in.
+    """
+    result = await db.execute(
+        select(Transfer)
+        .where(Transfer.id == transfer_id)
+        .options(
+            selectinload(Transfer.t2220_form).joinedload(T2220Form.verified_by),
+            selectinload(Transfer.zendesk_tickets).joinedload(ZendeskTicket.assigned_agent),
+            selectinload(Transfer.zendesk_tickets).selectinload(ZendeskTicket.jira_tickets)
+            .joinedload(JiraTicket.created_by),
+            selectinload(Transfer.jira_tickets).joinedload(JiraTicket.created_by),
+        )
+    )
+    transfer = result.scalars().first()
+    if not transfer:
+        raise HTTPException(status_code=404, detail="Transfer not found")
+    return transfer
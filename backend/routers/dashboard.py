@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db
+from models.user import User
+from models.dashboard_counter import DashboardCounter
+from auth import get_current_user
+from counters import read_counters
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+@router.get("/stats")
+async def get_dashboard_stats(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Transfers by status, Zendesk tickets by status and priority, open JIRA tickets and unverified forms.
+
+    Read from the maintained counters, so the cost does not grow with the tables.
+    """
+    result = await db.execute(select(DashboardCounter.metric, DashboardCounter.bucket, DashboardCounter.value))
+    return read_counters(result.all())
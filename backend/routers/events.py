@@ -0,0 +1,82 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import os
+
+from database import AsyncSessionLocal
+from models.user import User
+from auth import user_from_token
+from events import QUEUES, broker
+from serialization import dumps
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+RECONNECT_MILLISECONDS = 3000
+
+
+async def get_stream_user(request: Request, token: Optional[str] = None) -> User:
+    """Bearer header, or ?token= since browsers' EventSource cannot set headers"""
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token = authorization[len("bearer "):]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    # Short-lived session: a stream must not hold a pooled connection for hours
+    async with AsyncSessionLocal() as db:
+        return await user_from_token(token, db)
+
+
+def _format(item: dict) -> str:
+    return f"id: {item['id']}\nevent: {item['type']}\ndata: {dumps(item['data']).decode()}\n\n"
+
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    queues: Optional[str] = None,
+    current_user: User = Depends(get_stream_user)
+):
+    """Server-Sent Events for changes on the given queues.
+
+    ``queues`` is a comma-separated subset of atlas, t2220, zendesk and
+    jira (default: all). Reconnecting clients send Last-Event-ID and get
+    the recent events they missed. A "resync" event means the client fell
+    too far behind and should refetch its lists before reconnecting.
+    """
+    selected = {name.strip() for name in queues.split(",") if name.strip()} if queues else set(QUEUES)
+    unknown = selected - set(QUEUES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown queues: {', '.join(sorted(unknown))}")
+
+    last_event_id = request.headers.get("last-event-id")
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+
+    async def stream():
+        subscriber = broker.subscribe(selected, last_event_id)
+        try:
+            yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+            while True:
+                if subscriber.lagged and subscriber.events.empty():
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                try:
+                    item = await asyncio.wait_for(subscriber.events.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comment lines keep proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield _format(item)
+        finally:
+            broker.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
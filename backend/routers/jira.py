@@ -1,68 +1,97 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import Integer, case, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
+import os
 
 from database import get_db
 from models.user import User
 from models.jira_ticket import JiraTicket
 from models.zendesk_ticket import ZendeskTicket
-from schemas.jira_ticket import JiraTicketCreate, JiraTicketUpdate, JiraTicketResponse
+from schemas.jira_ticket import JiraTicketCreate, JiraTicketUpdate, JiraTicketResponse, JiraTicketBulkUpdate
+from schemas.bulk import BulkUpdateResponse
 from auth import get_current_user
+from bulk import bulk_update, filter_conditions
+from conditional import ETAG_HEADER, versioned_row
+from pagination import paginate
+from serialization import FIELDS_QUERY, FastJSONResponse, lean_response, schema_columns
+from sequences import BlockSequence
 
 router = APIRouter(prefix="/jira", tags=["JIRA Escalations"])
 
 
-def generate_ticket_key(db: Session):
-    count = db.query(JiraTicket).count()
-    return f"XFER-{count + 1001}"
+def _first_unused_key_number(connection) -> int:
+    # XFER-1001 is the first key; continue after any keys already issued
+    highest = connection.execute(
+        select(func.max(cast(func.substr(JiraTicket.ticket_key, 6), Integer)))
+    ).scalar()
+    return max(highest or 0, 1000) + 1
+
+
+ticket_key_sequence = BlockSequence(
+    "jira_ticket_key",
+    block_size=int(os.getenv("JIRA_KEY_BLOCK_SIZE", "50")),
+    initial_value=_first_unused_key_number,
+)
+
+
+async def generate_ticket_key():
+    return f"XFER-{await ticket_key_sequence.next_value_async()}"
 
 
 @router.get("/tickets", response_model=List[JiraTicketResponse])
-def get_jira_tickets(
+async def get_jira_tickets(
+    response: Response,
+    request: Request,
     status: str = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(JiraTicket)
+    query = select(*schema_columns(JiraTicket, JiraTicketResponse, fields))
 
     if status:
-        query = query.filter(JiraTicket.status == status)
+        query = query.where(JiraTicket.status == status)
 
-    tickets = query.order_by(JiraTicket.created_at.desc()).offset(skip).limit(limit).all()
-    return tickets
+    rows = await paginate(db, query, JiraTicket, cursor, skip, limit, response, request)
+    return lean_response(rows, response)
 
 
 @router.get("/tickets/{ticket_id}", response_model=JiraTicketResponse)
-def get_jira_ticket(
+async def get_jira_ticket(
+    request: Request,
     ticket_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    ticket = db.query(JiraTicket).filter(JiraTicket.id == ticket_id).first()
-    if not ticket:
+    found = await versioned_row(
+        db, request, JiraTicket, schema_columns(JiraTicket, JiraTicketResponse, fields), JiraTicket.id == ticket_id, fields,
+    )
+    if found is None:
         raise HTTPException(status_code=404, detail="JIRA ticket not found")
-    return ticket
+    ticket, etag = found
+    return FastJSONResponse(ticket, headers={ETAG_HEADER: etag})
 
 
 @router.post("/tickets", response_model=JiraTicketResponse)
-def create_jira_ticket(
+async def create_jira_ticket(
     ticket_data: JiraTicketCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Create a JIRA escalation ticket"""
     # Verify zendesk ticket exists
-    zendesk = db.query(ZendeskTicket).filter(
-        ZendeskTicket.id == ticket_data.zendesk_ticket_id
-    ).first()
+    zendesk = await db.get(ZendeskTicket, ticket_data.zendesk_ticket_id)
     if not zendesk:
         raise HTTPException(status_code=404, detail="Zendesk ticket not found")
 
     ticket = JiraTicket(
-        ticket_key=generate_ticket_key(db),
+        ticket_key=await generate_ticket_key(),
         zendesk_ticket_id=ticket_data.zendesk_ticket_id,
         transfer_id=ticket_data.transfer_id,
         summary=ticket_data.summary,
@@ -76,19 +105,19 @@ def create_jira_ticket(
     zendesk.status = "pending"
 
     db.add(ticket)
-    db.commit()
-    db.refresh(ticket)
+    await db.commit()
+    await db.refresh(ticket)
     return ticket
 
 
 @router.put("/tickets/{ticket_id}", response_model=JiraTicketResponse)
-def update_jira_ticket(
+async def update_jira_ticket(
     ticket_id: int,
     ticket_data: JiraTicketUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    ticket = db.query(JiraTicket).filter(JiraTicket.id == ticket_id).first()
+    ticket = await db.get(JiraTicket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="JIRA ticket not found")
 
@@ -101,6 +130,25 @@ def update_jira_ticket(
     for field, value in update_data.items():
         setattr(ticket, field, value)
 
-    db.commit()
-    db.refresh(ticket)
+    await db.commit()
+    await db.refresh(ticket)
     return ticket
+
+
+@router.post("/tickets/bulk-update", response_model=BulkUpdateResponse)
+async def bulk_update_jira_tickets(
+    bulk_data: JiraTicketBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Set status and/or resolution on many JIRA tickets, picked by ids and/or a filter, in one UPDATE"""
+    values = bulk_data.model_dump(exclude_unset=True, include={"status", "resolution"})
+    extra_values = {}
+    # As in update_jira_ticket, only tickets not already Done get a new resolved_at
+    if values.get("status") == "Done":
+        extra_values["resolved_at"] = case(
+            (JiraTicket.status != "Done", datetime.utcnow()), else_=JiraTicket.resolved_at
+        )
+    return await bulk_update(
+        db, JiraTicket, bulk_data.ids, filter_conditions(JiraTicket, bulk_data.filter), values, extra_values,
+    )
@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends
+
+from models.user import User
+from auth import get_current_user, password_pool, user_cache
+from database import POOL_OPTIONS, pool_telemetry
+from events import broker
+from transfer_cache import transfer_cache
+
+router = APIRouter(prefix="/system", tags=["System"])
+
+
+@router.get("/caches")
+async def get_cache_stats(current_user: User = Depends(get_current_user)):
+    """Hit/miss counters for the in-process caches"""
+    return {"users": user_cache.stats(), "transfers": transfer_cache.stats()}
+
+
+@router.get("/password-pool")
+async def get_password_pool_stats(current_user: User = Depends(get_current_user)):
+    """Concurrency and queue depth of the bcrypt worker pool"""
+    return password_pool.stats()
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats(current_user: User = Depends(get_current_user)):
+    """Connection pool configuration, checkouts and acquire wait times"""
+    return {"config": POOL_OPTIONS, **pool_telemetry.stats()}
+
+
+@router.get("/events")
+async def get_event_stats(current_user: User = Depends(get_current_user)):
+    """Server-Sent Events subscribers and published event counts"""
+    return broker.stats()
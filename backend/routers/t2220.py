@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from datetime import datetime
 
 from database import get_db
@@ -8,59 +9,75 @@ from models.user import User
 from models.t2220_form import T2220Form
 from schemas.t2220_form import T2220FormCreate, T2220FormResponse, T2220FormVerify
 from auth import get_current_user
+from conditional import ETAG_HEADER, versioned_row
+from pagination import paginate
+from serialization import FIELDS_QUERY, FastJSONResponse, lean_response, row_response, schema_columns
 
 router = APIRouter(prefix="/t2220", tags=["T2220 Forms"])
 
 
 @router.get("/forms", response_model=List[T2220FormResponse])
-def get_forms(
+async def get_forms(
+    response: Response,
+    request: Request,
     verified: bool = None,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(T2220Form)
+    query = select(*schema_columns(T2220Form, T2220FormResponse, fields))
 
     if verified is not None:
-        query = query.filter(T2220Form.verified == verified)
+        query = query.where(T2220Form.verified == verified)
 
-    forms = query.order_by(T2220Form.created_at.desc()).offset(skip).limit(limit).all()
-    return forms
+    rows = await paginate(db, query, T2220Form, cursor, skip, limit, response, request)
+    return lean_response(rows, response)
 
 
 @router.get("/forms/{form_id}", response_model=T2220FormResponse)
-def get_form(
+async def get_form(
+    request: Request,
     form_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    form = db.query(T2220Form).filter(T2220Form.id == form_id).first()
-    if not form:
+    found = await versioned_row(
+        db, request, T2220Form, schema_columns(T2220Form, T2220FormResponse, fields), T2220Form.id == form_id, fields,
+    )
+    if found is None:
         raise HTTPException(status_code=404, detail="Form not found")
-    return form
+    form, etag = found
+    return FastJSONResponse(form, headers={ETAG_HEADER: etag})
 
 
 @router.get("/forms/transfer/{transfer_id}", response_model=T2220FormResponse)
-def get_form_by_transfer(
+async def get_form_by_transfer(
     transfer_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    form = db.query(T2220Form).filter(T2220Form.transfer_id == transfer_id).first()
+    result = await db.execute(
+        select(*schema_columns(T2220Form, T2220FormResponse, fields)).where(T2220Form.transfer_id == transfer_id)
+    )
+    form = result.first()
     if not form:
         raise HTTPException(status_code=404, detail="Form not found for this transfer")
-    return form
+    return row_response(form)
 
 
 @router.post("/forms/{form_id}/verify", response_model=T2220FormResponse)
-def verify_form(
+async def verify_form(
     form_id: int,
     verify_data: T2220FormVerify,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    form = db.query(T2220Form).filter(T2220Form.id == form_id).first()
+    form = await db.get(T2220Form, form_id)
     if not form:
         raise HTTPException(status_code=404, detail="Form not found")
 
@@ -69,6 +86,6 @@ def verify_form(
     form.verified_by_id = current_user.id
     form.verified_at = datetime.utcnow()
 
-    db.commit()
-    db.refresh(form)
+    await db.commit()
+    await db.refresh(form)
     return form
@@ -1,66 +1,130 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-import random
-import string
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import os
 
 from database import get_db
 from models.user import User
 from models.zendesk_ticket import ZendeskTicket
-from models.transfer import Transfer
-from schemas.zendesk_ticket import ZendeskTicketCreate, ZendeskTicketUpdate, ZendeskTicketResponse
+from schemas.zendesk_ticket import (
+    ZendeskTicketCreate, ZendeskTicketUpdate, ZendeskTicketResponse, ZendeskTicketSearchResult, ZendeskTicketBulkUpdate
+)
+from schemas.bulk import BulkUpdateResponse
 from auth import get_current_user
+from bulk import bulk_update, filter_conditions
+from conditional import ETAG_HEADER, versioned_row
+from pagination import paginate
+from search import search_terms, search_tickets_query
+from serialization import FIELDS_QUERY, FastJSONResponse, lean_response, schema_columns
+from sequences import BlockSequence
+from transfer_cache import transfer_cache
 
 router = APIRouter(prefix="/zendesk", tags=["Zendesk Tickets"])
 
 
-def generate_ticket_number():
-    return f"ZEN-{''.join(random.choices(string.digits, k=6))}"
+def _first_unused_ticket_number(connection) -> int:
+    # Continue above every number already issued, including the old random ones
+    highest = connection.execute(
+        select(func.max(cast(func.substr(ZendeskTicket.ticket_number, 5), Integer)))
+    ).scalar()
+    return max(highest or 0, 100000) + 1
+
+
+ticket_number_sequence = BlockSequence(
+    "zendesk_ticket_number",
+    block_size=int(os.getenv("ZENDESK_NUMBER_BLOCK_SIZE", "100")),
+    initial_value=_first_unused_ticket_number,
+)
+
+
+async def generate_ticket_number():
+    return f"ZEN-{await ticket_number_sequence.next_value_async():06d}"
 
 
 @router.get("/tickets", response_model=List[ZendeskTicketResponse])
-def get_tickets(
+async def get_tickets(
+    response: Response,
+    request: Request,
     status: str = None,
     priority: str = None,
     assigned_to_me: bool = False,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    query = db.query(ZendeskTicket)
+    query = select(*schema_columns(ZendeskTicket, ZendeskTicketResponse, fields))
 
     if status:
-        query = query.filter(ZendeskTicket.status == status)
+        query = query.where(ZendeskTicket.status == status)
     if priority:
-        query = query.filter(ZendeskTicket.priority == priority)
+        query = query.where(ZendeskTicket.priority == priority)
     if assigned_to_me:
-        query = query.filter(ZendeskTicket.assigned_agent_id == current_user.id)
+        query = query.where(ZendeskTicket.assigned_agent_id == current_user.id)
+
+    rows = await paginate(db, query, ZendeskTicket, cursor, skip, limit, response, request)
+    return lean_response(rows, response)
+
 
-    tickets = query.order_by(ZendeskTicket.created_at.desc()).offset(skip).limit(limit).all()
-    return tickets
+# Declared before /tickets/{ticket_id} so "search" is not taken for an id
+@router.get("/tickets/search", response_model=List[ZendeskTicketSearchResult])
+async def search_tickets(
+    response: Response,
+    q: str,
+    status: str = None,
+    priority: str = None,
+    limit: int = 20,
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Tickets matching ``q`` in subject, description, customer name or resolution notes, best first"""
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query has no words to match")
+
+    columns = schema_columns(ZendeskTicket, ZendeskTicketResponse, fields)
+    query = search_tickets_query(db.bind.dialect.name, columns, terms)
+    if query is None:
+        raise HTTPException(status_code=501, detail="Search is not supported on this database")
+
+    if status:
+        query = query.where(ZendeskTicket.status == status)
+    if priority:
+        query = query.where(ZendeskTicket.priority == priority)
+
+    result = await db.execute(query.limit(min(limit, 100)))
+    return lean_response(result.all(), response)
 
 
 @router.get("/tickets/{ticket_id}", response_model=ZendeskTicketResponse)
-def get_ticket(
+async def get_ticket(
+    request: Request,
     ticket_id: int,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = FIELDS_QUERY,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    ticket = db.query(ZendeskTicket).filter(ZendeskTicket.id == ticket_id).first()
-    if not ticket:
+    found = await versioned_row(
+        db, request, ZendeskTicket, schema_columns(ZendeskTicket, ZendeskTicketResponse, fields), ZendeskTicket.id == ticket_id, fields,
+    )
+    if found is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    return ticket
+    ticket, etag = found
+    return FastJSONResponse(ticket, headers={ETAG_HEADER: etag})
 
 
 @router.post("/tickets", response_model=ZendeskTicketResponse)
-def create_ticket(
+async def create_ticket(
     ticket_data: ZendeskTicketCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     ticket = ZendeskTicket(
-        ticket_number=generate_ticket_number(),
+        ticket_number=await generate_ticket_number(),
         customer_name=ticket_data.customer_name,
         customer_email=ticket_data.customer_email,
         subject=ticket_data.subject,
@@ -71,26 +135,24 @@ def create_ticket(
 
     # Auto-link to transfer if reference provided
     if ticket_data.transfer_reference:
-        transfer = db.query(Transfer).filter(
-            Transfer.reference_number == ticket_data.transfer_reference
-        ).first()
-        if transfer:
-            ticket.transfer_id = transfer.id
+        entry = await transfer_cache.get_by_reference(db, ticket_data.transfer_reference)
+        if entry:
+            ticket.transfer_id = entry["transfer"]["id"]
 
     db.add(ticket)
-    db.commit()
-    db.refresh(ticket)
+    await db.commit()
+    await db.refresh(ticket)
     return ticket
 
 
 @router.put("/tickets/{ticket_id}", response_model=ZendeskTicketResponse)
-def update_ticket(
+async def update_ticket(
     ticket_id: int,
     ticket_data: ZendeskTicketUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    ticket = db.query(ZendeskTicket).filter(ZendeskTicket.id == ticket_id).first()
+    ticket = await db.get(ZendeskTicket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
@@ -98,24 +160,37 @@ def update_ticket(
     for field, value in update_data.items():
         setattr(ticket, field, value)
 
-    db.commit()
-    db.refresh(ticket)
+    await db.commit()
+    await db.refresh(ticket)
     return ticket
 
 
+@router.post("/tickets/bulk-update", response_model=BulkUpdateResponse)
+async def bulk_update_tickets(
+    bulk_data: ZendeskTicketBulkUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Set status and/or resolution notes on many tickets, picked by ids and/or a filter, in one UPDATE"""
+    return await bulk_update(
+        db, ZendeskTicket, bulk_data.ids, filter_conditions(ZendeskTicket, bulk_data.filter),
+        bulk_data.model_dump(exclude_unset=True, include={"status", "resolution_notes"}),
+    )
+
+
 @router.post("/tickets/{ticket_id}/assign", response_model=ZendeskTicketResponse)
-def assign_ticket(
+async def assign_ticket(
     ticket_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Assign ticket to current user"""
-    ticket = db.query(ZendeskTicket).filter(ZendeskTicket.id == ticket_id).first()
+    ticket = await db.get(ZendeskTicket, ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
 
     ticket.assigned_agent_id = current_user.id
     ticket.status = "in_progress"
-    db.commit()
-    db.refresh(ticket)
+    await db.commit()
+    await db.refresh(ticket)
     return ticket
@@ -1,13 +1,19 @@
 from schemas.user import UserCreate, UserResponse, UserLogin, Token
-from schemas.transfer import TransferCreate, TransferUpdate, TransferResponse
+from schemas.transfer import TransferCreate, TransferUpdate, TransferResponse, TransferBulkUpdate
 from schemas.t2220_form import T2220FormCreate, T2220FormResponse, T2220FormVerify
-from schemas.zendesk_ticket import ZendeskTicketCreate, ZendeskTicketUpdate, ZendeskTicketResponse
-from schemas.jira_ticket import JiraTicketCreate, JiraTicketUpdate, JiraTicketResponse
+from schemas.zendesk_ticket import ZendeskTicketCreate, ZendeskTicketUpdate, ZendeskTicketResponse, ZendeskTicketBulkUpdate
+from schemas.jira_ticket import JiraTicketCreate, JiraTicketUpdate, JiraTicketResponse, JiraTicketBulkUpdate
+from schemas.transfer_mismatch import TransferMismatchResponse
+from schemas.case import TransferCaseResponse
+from schemas.bulk import BulkUpdateResponse
 
 __all__ = [
     "UserCreate", "UserResponse", "UserLogin", "Token",
-    "TransferCreate", "TransferUpdate", "TransferResponse",
+    "TransferCreate", "TransferUpdate", "TransferResponse", "TransferBulkUpdate",
     "T2220FormCreate", "T2220FormResponse", "T2220FormVerify",
-    "ZendeskTicketCreate", "ZendeskTicketUpdate", "ZendeskTicketResponse",
-    "JiraTicketCreate", "JiraTicketUpdate", "JiraTicketResponse",
+    "ZendeskTicketCreate", "ZendeskTicketUpdate", "ZendeskTicketResponse", "ZendeskTicketBulkUpdate",
+    "JiraTicketCreate", "JiraTicketUpdate", "JiraTicketResponse", "JiraTicketBulkUpdate",
+    "TransferMismatchResponse",
+    "TransferCaseResponse",
+    "BulkUpdateResponse",
 ]
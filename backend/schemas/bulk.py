@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class BulkUpdateResult(BaseModel):
+    id: int
+    outcome: str  # updated, unchanged, filtered_out, not_found
+
+
+class BulkUpdateResponse(BaseModel):
+    matched: int
+    updated: int
+    results: List[BulkUpdateResult]
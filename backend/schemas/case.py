@@ -0,0 +1,26 @@
+from typing import List, Optional
+
+from schemas.user import UserResponse
+from schemas.transfer import TransferResponse
+from schemas.t2220_form import T2220FormResponse
+from schemas.zendesk_ticket import ZendeskTicketResponse
+from schemas.jira_ticket import JiraTicketResponse
+
+
+class CaseT2220Form(T2220FormResponse):
+    verified_by: Optional[UserResponse]
+
+
+class CaseJiraTicket(JiraTicketResponse):
+    created_by: Optional[UserResponse]
+
+
+class CaseZendeskTicket(ZendeskTicketResponse):
+    assigned_agent: Optional[UserResponse]
+    jira_tickets: List[CaseJiraTicket]
+
+
+class TransferCaseResponse(TransferResponse):
+    t2220_form: Optional[CaseT2220Form]
+    zendesk_tickets: List[CaseZendeskTicket]
+    jira_tickets: List[CaseJiraTicket]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -19,6 +19,19 @@ class JiraTicketUpdate(BaseModel):
     resolution: Optional[str] = None
 
 
+class JiraTicketBulkFilter(BaseModel):
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    assignee: Optional[str] = None
+
+
+class JiraTicketBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[JiraTicketBulkFilter] = None
+    status: Optional[str] = None
+    resolution: Optional[str] = None
+
+
 class JiraTicketResponse(BaseModel):
     id: int
     ticket_key: str
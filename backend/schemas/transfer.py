@@ -25,6 +25,19 @@ class TransferUpdate(BaseModel):
     notes: Optional[str] = None
 
 
+class TransferBulkFilter(BaseModel):
+    status: Optional[str] = None
+    from_institution: Optional[str] = None
+    account_type: Optional[str] = None
+
+
+class TransferBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[TransferBulkFilter] = None
+    status: Optional[str] = None
+    notes: Optional[str] = None
+
+
 class TransferResponse(BaseModel):
     id: int
     reference_number: str
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+
+class TransferMismatchResponse(BaseModel):
+    id: int
+    transfer_id: int
+    t2220_form_id: int
+    field: str
+    atlas_value: Optional[str]
+    form_value: Optional[str]
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -20,6 +20,19 @@ class ZendeskTicketUpdate(BaseModel):
     transfer_id: Optional[int] = None
 
 
+class ZendeskTicketBulkFilter(BaseModel):
+    status: Optional[str] = None
+    priority: Optional[str] = None
+    assigned_agent_id: Optional[int] = None
+
+
+class ZendeskTicketBulkUpdate(BaseModel):
+    ids: Optional[List[int]] = None
+    filter: Optional[ZendeskTicketBulkFilter] = None
+    status: Optional[str] = None
+    resolution_notes: Optional[str] = None
+
+
 class ZendeskTicketResponse(BaseModel):
     id: int
     ticket_number: str
@@ -38,3 +51,7 @@ class ZendeskTicketResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ZendeskTicketSearchResult(ZendeskTicketResponse):
+    rank: float
@@ -0,0 +1,106 @@
+"""Full-text search over Zendesk tickets.
+
+SQLite keeps an FTS5 external-content table, zendesk_tickets_fts, in step
+with zendesk_tickets through triggers. Postgres gets a generated tsvector
+column with a GIN index. Either way the index follows every insert and
+update, including bulk Core writes. The DDL is applied by
+startup.init_schema; bump SEARCH_SCHEMA_VERSION when it changes so
+existing databases pick it up.
+"""
+import re
+
+from sqlalchemy import func, literal_column, select, table, column, text
+
+from models.zendesk_ticket import ZendeskTicket
+
+SEARCH_SCHEMA_VERSION = 1
+SEARCHED_COLUMNS = ("subject", "description", "customer_name", "resolution_notes")
+# Relative weight of a match in each column (bm25 weights / tsvector labels)
+COLUMN_WEIGHTS = {"subject": 10.0, "customer_name": 5.0, "description": 2.0, "resolution_notes": 1.0}
+MAX_SEARCH_TERMS = 16
+
+_FTS_TABLE = "zendesk_tickets_fts"
+_POSTGRES_LABELS = {"subject": "A", "customer_name": "A", "description": "B", "resolution_notes": "C"}
+
+
+def _sqlite_ddl() -> list:
+    columns = ", ".join(SEARCHED_COLUMNS)
+    new_values = ", ".join(f"new.{name}" for name in SEARCHED_COLUMNS)
+    old_values = ", ".join(f"old.{name}" for name in SEARCHED_COLUMNS)
+    remove_old = f"INSERT INTO {_FTS_TABLE}({_FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});"
+    add_new = f"INSERT INTO {_FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        f"CREATE VIRTUAL TABLE {_FTS_TABLE} USING fts5({columns}, "
+        f"content='zendesk_tickets', content_rowid='id', tokenize='porter unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {_FTS_TABLE}_insert AFTER INSERT ON zendesk_tickets BEGIN {add_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {_FTS_TABLE}_delete AFTER DELETE ON zendesk_tickets BEGIN {remove_old} END",
+        f"CREATE TRIGGER IF NOT EXISTS {_FTS_TABLE}_update AFTER UPDATE OF {columns} ON zendesk_tickets "
+        f"BEGIN {remove_old} {add_new} END",
+        # Index the tickets that existed before the table did
+        f"INSERT INTO {_FTS_TABLE}({_FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+def _postgres_ddl() -> list:
+    vector = " || ".join(
+        f"setweight(to_tsvector('english', coalesce({name}, '')), '{_POSTGRES_LABELS[name]}')"
+        for name in SEARCHED_COLUMNS
+    )
+    return [
+        f"ALTER TABLE zendesk_tickets ADD COLUMN IF NOT EXISTS search_vector tsvector "
+        f"GENERATED ALWAYS AS ({vector}) STORED",
+        "CREATE INDEX IF NOT EXISTS ix_zendesk_tickets_search_vector ON zendesk_tickets USING GIN (search_vector)",
+    ]
+
+
+def create_search_index(connection):
+    """Create the search index for this database's dialect if it is missing"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": _FTS_TABLE}
+        ).first()
+        if exists:
+            return
+        statements = _sqlite_ddl()
+    elif dialect == "postgresql":
+        statements = _postgres_ddl()
+    else:
+        return
+    for statement in statements:
+        connection.execute(text(statement))
+
+
+def search_terms(q: str) -> list:
+    """Words of a free-text query, stripped of any search syntax"""
+    return re.findall(r"\w+", q.lower())[:MAX_SEARCH_TERMS]
+
+
+def search_tickets_query(dialect: str, columns: list, terms: list):
+    """Select ``columns`` plus a ``rank`` (higher is better) for tickets matching any term.
+
+    Terms are OR-ed so that filler words ("the ticket about") do not rule
+    out results; the ranking puts tickets matching more, rarer terms first.
+    """
+    if dialect == "sqlite":
+        fts = table(_FTS_TABLE, column("rowid"))
+        match = " OR ".join(f'"{term}"' for term in terms)
+        weights = [COLUMN_WEIGHTS[name] for name in SEARCHED_COLUMNS]
+        # bm25() is lower for better matches
+        rank = (-func.bm25(literal_column(_FTS_TABLE), *weights)).label("rank")
+        return (
+            select(*columns, rank)
+            .join_from(ZendeskTicket, fts, fts.c.rowid == ZendeskTicket.id)
+            .where(literal_column(_FTS_TABLE).op("MATCH")(match))
+            .order_by(rank.desc())
+        )
+    if dialect == "postgresql":
+        vector = literal_column("zendesk_tickets.search_vector")
+        query = func.to_tsquery("english", " | ".join(terms))
+        rank = func.ts_rank(vector, query).label("rank")
+        return (
+            select(*columns, rank)
+            .where(vector.op("@@")(query))
+            .order_by(rank.desc())
+        )
+    return None
@@ -0,0 +1,107 @@
+import asyncio
+import threading
+from typing import Callable
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from database import IS_SQLITE_MEMORY, async_engine, engine, make_async_engine, make_engine
+from models.key_sequence import KeySequence
+
+# Leases open their own connections: a request already holding a pooled
+# connection must never wait on the same pool for a second one. An
+# in-memory database only exists on the app engine's connection, so
+# leases share that one instead.
+_lease_engine = engine if IS_SQLITE_MEMORY else make_engine()
+_async_lease_engine = async_engine if IS_SQLITE_MEMORY else make_async_engine()
+
+
+class BlockSequence:
+    """Unique, increasing integers without a database round-trip per value.
+
+    Each process leases a block of ``block_size`` values from its row in
+    ``key_sequences`` and hands them out from memory. Leasing bumps the row
+    in its own short transaction, which the database serializes, so blocks
+    never overlap across threads, workers or instances. Values left in a
+    block when a process exits are skipped, like a database sequence.
+    """
+
+    def __init__(self, name: str, block_size: int, initial_value: Callable):
+        self.name = name
+        self.block_size = block_size
+        # Called with a connection the first time the row is created
+        self._initial_value = initial_value
+        self._lock = threading.Lock()
+        self._async_lock = asyncio.Lock()
+        self._next = 0
+        self._limit = 0
+        self.leases = 0
+
+    def next_value(self) -> int:
+        """Next value, leasing through the sync engine; for scripts and threads"""
+        with self._lock:
+            if self._next >= self._limit:
+                self._next = self._lease()
+                self._limit = self._next + self.block_size
+            value = self._next
+            self._next += 1
+            return value
+
+    async def next_value_async(self) -> int:
+        """Next value, leasing through the async engine so the event loop never blocks"""
+        value = self._take()
+        if value is None:
+            async with self._async_lock:
+                value = self._take()
+                if value is None:
+                    start = await self._lease_async()
+                    with self._lock:
+                        self._next, self._limit = start + 1, start + self.block_size
+                    value = start
+        return value
+
+    def _take(self):
+        """Next value from the current block, or None once it is used up"""
+        with self._lock:
+            if self._next >= self._limit:
+                return None
+            value = self._next
+            self._next += 1
+            return value
+
+    def _lease(self) -> int:
+        while True:
+            try:
+                with _lease_engine.begin() as connection:
+                    start = self._bump(connection)
+                self.leases += 1
+                return start
+            except IntegrityError:
+                # Another process created the row first; lease from it instead
+                continue
+
+    async def _lease_async(self) -> int:
+        while True:
+            try:
+                async with _async_lease_engine.begin() as connection:
+                    start = await connection.run_sync(self._bump)
+                self.leases += 1
+                return start
+            except IntegrityError:
+                continue
+
+    def _bump(self, connection) -> int:
+        bumped = connection.execute(
+            update(KeySequence)
+            .where(KeySequence.name == self.name)
+            .values(next_value=KeySequence.next_value + self.block_size)
+        )
+        if bumped.rowcount:
+            return connection.execute(
+                select(KeySequence.next_value).where(KeySequence.name == self.name)
+            ).scalar_one() - self.block_size
+
+        start = self._initial_value(connection)
+        connection.execute(
+            insert(KeySequence).values(name=self.name, next_value=start + self.block_size)
+        )
+        return start
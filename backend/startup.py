@@ -1,16 +1,75 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
+from sqlalchemy import delete, insert, inspect, select
 from sqlalchemy.orm import Session
-from database import SessionLocal
+import argparse
+import hashlib
+import os
+import time
+from database import Base, SessionLocal, engine
 from models.user import User
 from models.transfer import Transfer
 from models.t2220_form import T2220Form
 from models.zendesk_ticket import ZendeskTicket
 from models.jira_ticket import JiraTicket
-from auth import get_password_hash
+from models.schema_version import SchemaVersion
+import mismatches  # noqa: F401 - keeps transfer_mismatches in step with the seed data
+from search import SEARCH_SCHEMA_VERSION, create_search_index
+from counters import reconcile_counters
 
+# "auto" applies the schema only when its fingerprint changed, "always"
+# runs create_all on every boot, "skip" leaves the database alone
+SCHEMA_SYNC = os.getenv("SCHEMA_SYNC", "auto")
+# Seed an empty database at boot; turn off and run `python startup.py seed` instead
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "true").lower() == "true"
 
-def run_startup():
+# bcrypt hashes of the demo passwords, precomputed so seeding does no hashing
+PASSWORD123_HASH = "$2b$12$Bz2F1fgJk14GYyVJU8S7PeH.osjSWWUbDwDrQwEZQXsJNe.jJhtoW"
+ADMIN123_HASH = "$2b$12$5sBRTEDDGJ5u.xLgQm3vMujTK/7S9uquF.pijSfhZhRGo0Lg3M9ay"
+
+
+def schema_fingerprint() -> str:
+    """Hash of every table, column and index the models declare, plus the search index DDL"""
+    parts = [f"search:{SEARCH_SCHEMA_VERSION}"]
+    for table in Base.metadata.sorted_tables:
+        parts.append(table.name)
+        parts.extend(f"{column.name}:{column.type!r}:{column.nullable}" for column in table.columns)
+        parts.extend(sorted(
+            f"{index.name}:{','.join(column.name for column in index.columns)}" for index in table.indexes
+        ))
+    return hashlib.sha256("\n".join(parts).encode()).hexdigest()[:16]
+
+
+def init_schema() -> str:
+    """Create missing tables and indexes unless the recorded fingerprint already matches"""
+    if SCHEMA_SYNC == "skip":
+        return "skipped"
+
+    fingerprint = schema_fingerprint()
+    if SCHEMA_SYNC == "auto" and inspect(engine).has_table(SchemaVersion.__tablename__):
+        with engine.connect() as connection:
+            current = connection.execute(select(SchemaVersion.fingerprint)).scalar()
+        if current == fingerprint:
+            return "up to date"
+
+    Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add any indexes they are missing
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+    with engine.begin() as connection:
+        create_search_index(connection)
+        # The counters may be new, or stale from before this schema
+        reconcile_counters(connection)
+
+    with engine.begin() as connection:
+        connection.execute(delete(SchemaVersion))
+        connection.execute(insert(SchemaVersion).values(id=1, fingerprint=fingerprint))
+    return "applied"
+
+
+def seed_database() -> str:
     db = SessionLocal()
     try:
         # Only seed if database is empty
@@ -19,12 +78,33 @@ def run_startup():
             seed_transfers_and_forms(db)
             seed_zendesk_tickets(db)
             print("Database seeded successfully!")
+            return "seeded"
         else:
             print("Database already contains data, skipping seed.")
+            return "already seeded"
     finally:
         db.close()
 
 
+def run_startup(import_seconds: float = None):
+    """Prepare the database for serving and report how long each phase took"""
+    phases = []
+    if import_seconds is not None:
+        phases.append(("imports", import_seconds, "done"))
+
+    started = time.perf_counter()
+    outcome = init_schema()
+    phases.append(("schema", time.perf_counter() - started, outcome))
+
+    started = time.perf_counter()
+    outcome = seed_database() if SEED_ON_STARTUP else "disabled"
+    phases.append(("seed", time.perf_counter() - started, outcome))
+
+    print("Startup phases: " + ", ".join(
+        f"{name} {seconds * 1000:.1f}ms ({outcome})" for name, seconds, outcome in phases
+    ))
+
+
 def seed_users(db: Session):
     """Seed CS agents and admin users"""
     users = [
@@ -32,7 +112,7 @@ def seed_users(db: Session):
             username="sarah.mitchell",
             email="sarah.mitchell@wealthsimple.com",
             full_name="Sarah Mitchell",
-            hashed_password=get_password_hash("password123"),
+            hashed_password=PASSWORD123_HASH,
             is_admin=False,
             role="cs_agent"
         ),
@@ -40,7 +120,7 @@ def seed_users(db: Session):
             username="david.chen",
             email="david.chen@wealthsimple.com",
             full_name="David Chen",
-            hashed_password=get_password_hash("password123"),
+            hashed_password=PASSWORD123_HASH,
             is_admin=False,
             role="cs_agent"
         ),
@@ -48,7 +128,7 @@ def seed_users(db: Session):
             username="maria.garcia",
             email="maria.garcia@wealthsimple.com",
             full_name="Maria Garcia",
-            hashed_password=get_password_hash("password123"),
+            hashed_password=PASSWORD123_HASH,
             is_admin=False,
             role="cs_agent"
         ),
@@ -56,7 +136,7 @@ def seed_users(db: Session):
             username="admin",
             email="admin@wealthsimple.com",
             full_name="System Admin",
-            hashed_password=get_password_hash("admin123"),
+            hashed_password=ADMIN123_HASH,
             is_admin=True,
             role="admin"
         ),
@@ -64,7 +144,7 @@ def seed_users(db: Session):
             username="transfers.team",
             email="transfers@wealthsimple.com",
             full_name="Transfers Team",
-            hashed_password=get_password_hash("password123"),
+            hashed_password=PASSWORD123_HASH,
             is_admin=False,
             role="transfers_team"
         ),
@@ -405,4 +485,17 @@ def seed_zendesk_tickets(db: Session):
 
 
 if __name__ == "__main__":
-    run_startup()
+    parser = argparse.ArgumentParser(description="Database setup for the transfer system")
+    parser.add_argument(
+        "command", nargs="?", default="startup", choices=["startup", "schema", "seed"],
+        help="startup: what the API runs at boot; schema: apply the schema only; "
+             "seed: apply the schema and seed an empty database",
+    )
+    args = parser.parse_args()
+    if args.command == "schema":
+        print(f"Schema {init_schema()}")
+    elif args.command == "seed":
+        print(f"Schema {init_schema()}")
+        seed_database()
+    else:
+        run_startup()
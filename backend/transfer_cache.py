@@ -0,0 +1,134 @@
+"""Read-through cache for transfer lookups by id and by reference number.
+
+Entries hold a transfer's response fields plus its version, the same
+coalesce(updated_at, created_at) the ETags are built on, so a cached
+detail read answers 200 or 304 without touching the database. Reference
+numbers map to ids, and they never change once issued, so updates only
+drop the id entry.
+
+By default each worker keeps its own LRU with a short TTL. Setting
+TRANSFER_CACHE_REDIS_URL (needs ``pip install redis``) stores entries in
+Redis instead, so an invalidation by one worker is seen by all of them.
+Writers must call invalidate() once their change is committed; a read
+racing a write can still re-cache the old row until the TTL runs out.
+"""
+import os
+from typing import Optional
+
+import orjson
+from sqlalchemy import select
+
+from cache import TTLCache
+from models.transfer import Transfer
+from schemas.transfer import TransferResponse
+from serialization import dumps, schema_columns
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # optional, only needed for the shared store
+    redis_asyncio = None
+
+TRANSFER_CACHE_SIZE = int(os.getenv("TRANSFER_CACHE_SIZE", "4096"))
+TRANSFER_CACHE_TTL_SECONDS = float(os.getenv("TRANSFER_CACHE_TTL_SECONDS", "30"))
+TRANSFER_CACHE_REDIS_URL = os.getenv("TRANSFER_CACHE_REDIS_URL", "")
+TRANSFER_CACHE_REDIS_PREFIX = os.getenv("TRANSFER_CACHE_REDIS_PREFIX", "transfer-system:transfers:")
+
+
+class _RedisStore:
+    """Entries as orjson in Redis; dates and amounts come back as the strings they encode to"""
+
+    def __init__(self, url: str, ttl: float, prefix: str):
+        self._client = redis_asyncio.from_url(url)
+        self._ttl = max(int(ttl), 1)
+        self._prefix = prefix
+
+    async def get(self, key: str):
+        value = await self._client.get(self._prefix + key)
+        return None if value is None else orjson.loads(value)
+
+    async def set(self, key: str, value):
+        await self._client.set(self._prefix + key, dumps(value), ex=self._ttl)
+
+    async def delete(self, *keys: str):
+        await self._client.delete(*(self._prefix + key for key in keys))
+
+
+class TransferCache:
+    def __init__(self, maxsize: int, ttl: float, redis_url: str = ""):
+        self._local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._redis = None
+        if redis_url:
+            if redis_asyncio is None:
+                print("TRANSFER_CACHE_REDIS_URL is set but redis is not installed; caching transfers per worker")
+            else:
+                self._redis = _RedisStore(redis_url, ttl, TRANSFER_CACHE_REDIS_PREFIX)
+        self.hits = 0
+        self.misses = 0
+
+    async def _get(self, key: str):
+        if self._redis is not None:
+            return await self._redis.get(key)
+        return self._local.get(key)
+
+    async def _set(self, key: str, value):
+        if self._redis is not None:
+            await self._redis.set(key, value)
+        else:
+            self._local.set(key, value)
+
+    async def _load(self, db, condition) -> Optional[dict]:
+        result = await db.execute(select(*schema_columns(Transfer, TransferResponse)).where(condition))
+        row = result.first()
+        if row is None:
+            return None
+        transfer = dict(row._mapping)
+        entry = {"version": str(transfer["updated_at"] or transfer["created_at"]), "transfer": transfer}
+        await self._set(f"id:{transfer['id']}", entry)
+        await self._set(f"ref:{transfer['reference_number']}", transfer["id"])
+        return entry
+
+    async def get_by_id(self, db, transfer_id: int) -> Optional[dict]:
+        """``{"version", "transfer"}`` for the transfer, from the cache or the database; None if missing"""
+        entry = await self._get(f"id:{transfer_id}")
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return await self._load(db, Transfer.id == transfer_id)
+
+    async def get_by_reference(self, db, reference_number: str) -> Optional[dict]:
+        transfer_id = await self._get(f"ref:{reference_number}")
+        if transfer_id is not None:
+            entry = await self._get(f"id:{transfer_id}")
+            if entry is not None:
+                self.hits += 1
+                return entry
+        self.misses += 1
+        return await self._load(db, Transfer.reference_number == reference_number)
+
+    async def invalidate(self, *transfer_ids: int):
+        keys = [f"id:{transfer_id}" for transfer_id in transfer_ids]
+        if not keys:
+            return
+        if self._redis is not None:
+            await self._redis.delete(*keys)
+        else:
+            for key in keys:
+                self._local.invalidate(key)
+
+    def clear(self):
+        """Drop this worker's entries; a shared store is left alone"""
+        self._local.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            **self._local.stats(),
+            "backend": "redis" if self._redis is not None else "memory",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+transfer_cache = TransferCache(TRANSFER_CACHE_SIZE, TRANSFER_CACHE_TTL_SECONDS, TRANSFER_CACHE_REDIS_URL)